@@ -0,0 +1,297 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from repofactor.application.agent_service import analysis_agent
+from repofactor.application.agent_service.analysis_agent import CodeAnalysisAgent
+
+
+@pytest.fixture(autouse=True)
+def _clear_analysis_cache():
+    analysis_agent._analysis_cache.clear()
+    analysis_agent._prompt_cache.clear()
+    yield
+    analysis_agent._analysis_cache.clear()
+    analysis_agent._prompt_cache.clear()
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.delenv("REPOFACTOR_KEEP_RAW", raising=False)
+    monkeypatch.delenv("REPOFACTOR_STREAM_REPLIES", raising=False)
+    with patch.object(analysis_agent, "LightningAIClient", Mock()):
+        yield CodeAnalysisAgent()
+
+
+@pytest.mark.asyncio
+async def test_analyze_repository_splits_large_inputs_into_batches(agent):
+    batches = []
+
+    async def fake_batch(repo_content, target_context, user_instructions):
+        batches.append(list(repo_content))
+        first = next(iter(repo_content))
+        return {
+            "main_modules": ["core"],
+            "dependencies": ["httpx"],
+            "affected_files": [{"path": first, "reason": "", "confidence": 80, "changes": []}],
+            "risks": [],
+            "implementation_steps": [],
+            "raw_llm_response": first,
+        }
+
+    repo_content = {f"f{i}.py": "" for i in range(analysis_agent.ANALYSIS_BATCH_SIZE + 1)}
+    with patch.object(agent, "_analyze_batch", side_effect=fake_batch):
+        result = await agent.analyze_repository(repo_content, user_instructions="x")
+
+    assert [len(b) for b in batches] == [analysis_agent.ANALYSIS_BATCH_SIZE, 1]
+    assert result["dependencies"] == ["httpx"]
+    assert [f["path"] for f in result["affected_files"]] == [
+        "f0.py", f"f{analysis_agent.ANALYSIS_BATCH_SIZE}.py"
+    ]
+
+
+def test_default_file_selection_fits_one_prompt():
+    """The service's default max_files must not be split across LLM calls"""
+    assert analysis_agent.ANALYSIS_BATCH_SIZE >= 10
+
+
+def test_parse_sync_handles_direct_and_embedded_json(agent):
+    direct = agent._parse_sync('{"dependencies": ["httpx"]}')
+    embedded = agent._parse_sync('Sure! {"affected_files": [{"path": "a.py"}]} done')
+    fenced = agent._parse_sync('Here:\n```json\n{"risks": ["r"]}\n```\nThanks')
+    garbage = agent._parse_sync("not json at all")
+    array = agent._parse_sync('["not", "an", "object"]')
+
+    assert direct["dependencies"] == ["httpx"]
+    assert embedded["affected_files"][0]["path"] == "a.py"
+    assert fenced["risks"] == ["r"]
+    assert garbage["risks"] == ["Failed to parse LLM response"]
+    assert array["risks"] == ["Failed to parse LLM response"]
+
+
+async def _chunked(text, size):
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+@pytest.mark.asyncio
+async def test_iter_json_array_items_yields_elements_as_they_complete():
+    text = '```json\n{"main_modules": [], "affected_files": [{"path": "a.py"}, {"path": "b]}.py"}], "risks": []}\n```'
+    items = [item async for item in analysis_agent._iter_json_array_items(_chunked(text, 3), "affected_files")]
+
+    assert items == [{"path": "a.py"}, {"path": "b]}.py"}]
+
+
+@pytest.mark.asyncio
+async def test_stream_affected_files_validates_and_dedupes(agent):
+    reply = (
+        '{"affected_files": ['
+        '{"path": "a.py", "reason": "r", "confidence": 90, "changes": []}, '
+        '{"path": "bad.py"}, '
+        '{"path": "a.py", "reason": "r", "confidence": 90, "changes": []}]}'
+    )
+    agent.client.generate_streaming = lambda **kwargs: _chunked(reply, 7)
+
+    files = [f async for f in agent.stream_affected_files({"a.py": ""})]
+
+    assert [f["path"] for f in files] == ["a.py"]
+
+
+@pytest.mark.asyncio
+async def test_analyze_repositories_batch_keeps_order_and_isolates_failures(agent):
+    async def fake_analyze(repo_content, target_context=None, user_instructions=""):
+        if user_instructions == "boom":
+            raise RuntimeError("boom")
+        return {"files": list(repo_content)}
+
+    with patch.object(agent, "analyze_repository", side_effect=fake_analyze):
+        results = await agent.analyze_repositories_batch([
+            {"repo_content": {"a.py": ""}},
+            {"repo_content": {"b.py": ""}, "user_instructions": "boom"},
+            {"repo_content": {"c.py": ""}},
+        ])
+
+    assert results[0] == {"files": ["a.py"]}
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == {"files": ["c.py"]}
+
+
+def test_find_json_spans_ignores_braces_in_strings_and_nests_freely():
+    text = 'Plan {"a": {"b": {"c": {"d": "} {"}}}} and {"e": "\\"}"} trailing {'
+    spans = analysis_agent._find_json_spans(text)
+
+    assert [text[a:b] for a, b in spans] == ['{"a": {"b": {"c": {"d": "} {"}}}}', '{"e": "\\"}"}']
+
+
+def test_parse_sync_extracts_deeply_nested_object(agent):
+    reply = 'Result: {"affected_files": [{"path": "a.py", "meta": {"x": {"y": {"z": 1}}}}]} ok'
+
+    assert agent._parse_sync(reply)["affected_files"][0]["path"] == "a.py"
+
+
+@pytest.mark.asyncio
+async def test_analyze_repository_caches_identical_requests(agent):
+    calls = []
+
+    async def fake_batch(repo_content, target_context, user_instructions):
+        calls.append(user_instructions)
+        risks = ["Failed to parse LLM response"] if user_instructions == "unparsable" else []
+        return {"affected_files": [], "dependencies": ["httpx"], "risks": risks}
+
+    with patch.object(agent, "_analyze_batch", side_effect=fake_batch):
+        first = await agent.analyze_repository({"a.py": "x = 1"}, user_instructions="x")
+        first["dependencies"].append("mutated by caller")
+        again = await agent.analyze_repository({"a.py": "x = 1"}, user_instructions="x")
+        await agent.analyze_repository({"a.py": "x = 2"}, user_instructions="x")
+        await agent.analyze_repository({"a.py": "x = 1"}, user_instructions="unparsable")
+        await agent.analyze_repository({"a.py": "x = 1"}, user_instructions="unparsable")
+
+    assert calls == ["x", "x", "unparsable", "unparsable"]
+    assert again["dependencies"] == ["httpx"]
+
+
+@pytest.mark.asyncio
+async def test_analyze_batch_sends_built_prompts_and_validates_reply(agent):
+    reply = '{"affected_files": [{"path": "a.py", "reason": "r", "confidence": 70, "changes": ["x"]}]}'
+    agent.client.generate = AsyncMock(return_value=Mock(text=reply))
+    agent.keep_raw = True
+
+    result = await agent._analyze_batch({"a.py": "x = 1"}, None, "add logging")
+
+    kwargs = agent.client.generate.call_args.kwargs
+    assert "a.py" in kwargs["prompt"] and "a.py" in kwargs["prompt_fallback"]()
+    assert result["affected_files"][0]["confidence"] == 70
+    assert result["raw_llm_response"] == reply
+
+
+def test_render_prompt_reuses_identical_renderings():
+    calls = []
+
+    def render(**kwargs):
+        calls.append(kwargs["instructions"])
+        return f"prompt for {kwargs['instructions']}"
+
+    first = analysis_agent._render_prompt(render, {"a.py": "x = 1"}, None, "x")
+    again = analysis_agent._render_prompt(render, {"a.py": "x = 1"}, None, "x")
+    analysis_agent._render_prompt(render, {"a.py": "x = 2"}, None, "x")
+
+    assert first == again == "prompt for x"
+    assert calls == ["x", "x"]
+
+
+@pytest.mark.asyncio
+async def test_parse_llm_response_moves_long_replies_off_the_loop(agent, monkeypatch):
+    offloaded = []
+    real_to_thread = analysis_agent.asyncio.to_thread
+
+    async def spy(func, *args):
+        offloaded.append(len(args[0]))
+        return await real_to_thread(func, *args)
+
+    monkeypatch.setattr(analysis_agent.asyncio, "to_thread", spy)
+    padding = " " * analysis_agent.PARSE_IN_THREAD_THRESHOLD
+    short = await agent._parse_llm_response('{"risks": ["r"]}')
+    long = await agent._parse_llm_response('{"risks": ["r"]}' + padding)
+
+    assert short["risks"] == long["risks"] == ["r"]
+    assert offloaded == [len(padding) + 16]
+
+
+@pytest.mark.asyncio
+async def test_read_until_analysis_object_stops_at_complete_analysis():
+    reply = 'Example {"x": 1} then {"dependencies": ["r"], "note": "}"} and more'
+    consumed = []
+
+    async def chunks():
+        for i in range(0, len(reply), 4):
+            consumed.append(reply[i:i + 4])
+            yield reply[i:i + 4]
+
+    text = await analysis_agent._read_until_analysis_object(chunks())
+
+    end = reply.index(" and more")  # The analysis object closes here
+    assert text == reply[:(end + 3) // 4 * 4]
+    assert "".join(consumed) == text
+
+
+def test_json_object_scanner_matches_whole_text_scan():
+    text = 'Plan {"a": {"b": "} {"}} and {"e": "\\"}"} trailing {'
+    scanner = analysis_agent._JsonObjectScanner()
+    spans = [span for i in range(0, len(text), 3) for span in scanner.feed(text[i:i + 3])]
+
+    assert spans == analysis_agent._find_json_spans(text)
+
+
+@pytest.mark.asyncio
+async def test_analyze_batch_streams_reply_when_enabled(agent):
+    reply = '{"affected_files": [{"path": "a.py", "reason": "r", "confidence": 70, "changes": []}]}'
+    agent.stream_replies = agent.keep_raw = True
+    agent.client.generate_streaming = lambda **kwargs: _chunked(reply + " trailing prose", 5)
+    agent.client.generate = AsyncMock()
+
+    result = await agent._analyze_batch({"a.py": "x = 1"}, None, "add logging")
+
+    assert result["affected_files"][0]["path"] == "a.py"
+    assert "trailing" not in result["raw_llm_response"]
+    agent.client.generate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_analyze_repository_skips_llm_for_empty_content(agent):
+    agent.client.generate = AsyncMock()
+
+    result = await agent.analyze_repository({}, user_instructions="x")
+
+    assert result["affected_files"] == [] and result["raw_llm_response"] is None
+    agent.client.generate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_analyze_batch_drops_raw_reply_by_default(agent):
+    agent.client.generate = AsyncMock(return_value=Mock(text='{"risks": ["r"]}'))
+
+    result = await agent._analyze_batch({"a.py": "x = 1"}, None, "add logging")
+
+    assert result["risks"] == ["r"]
+    assert result["raw_llm_response"] is None
+
+
+@pytest.mark.asyncio
+async def test_analyze_batch_forgets_unparsable_reply(agent):
+    response = Mock(text="Sorry, I can't help with that.")
+    agent.client.generate = AsyncMock(return_value=response)
+
+    result = await agent._analyze_batch({"a.py": "x = 1"}, None, "add logging")
+
+    assert result["risks"] == [analysis_agent._PARSE_FAILURE_RISK]
+    agent.client.forget_reply.assert_called_once_with(response)
+
+
+@pytest.mark.asyncio
+async def test_analysis_cache_respects_keep_raw(agent):
+    reply = '{"risks": ["r"]}'
+    agent.client.generate = AsyncMock(return_value=Mock(text=reply))
+    with patch.object(analysis_agent, "LightningAIClient", Mock()):
+        raw_agent = CodeAnalysisAgent(keep_raw=True)
+    raw_agent.client.generate = AsyncMock(return_value=Mock(text=reply))
+
+    plain = await agent.analyze_repository({"a.py": "x = 1"}, user_instructions="x")
+    raw = await raw_agent.analyze_repository({"a.py": "x = 1"}, user_instructions="x")
+
+    assert plain["raw_llm_response"] is None
+    assert raw["raw_llm_response"] == reply
+    assert all(
+        cached["raw_llm_response"] is None
+        for (keep_raw, _), cached in analysis_agent._analysis_cache.items()
+        if not keep_raw
+    )
+
+
+def test_analysis_key_covers_paths_and_contents():
+    files = {"a.py": "x = 1", "b.py": "y = 2"}
+
+    key = analysis_agent._analysis_key("m", files, None, "x")
+
+    assert key == analysis_agent._analysis_key("m", dict(reversed(files.items())), None, "x")
+    assert key != analysis_agent._analysis_key("m", {"a.py": "x = 1", "b.py": "y = 3"}, None, "x")
+    assert key != analysis_agent._analysis_key("m", {"a.py": "y = 2", "b.py": "x = 1"}, None, "x")
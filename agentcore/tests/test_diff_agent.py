@@ -1,11 +1,15 @@
+import difflib
+
 import pytest
+from repofactor.application.agent_service import diff_agent as diff_agent_module
 from repofactor.application.agent_service.diff_agent import DiffAgent
+from repofactor.utils import diff_tools
 
 @pytest.fixture
 def diff_agent():
     return DiffAgent()
 
-def test_generate_diff_basic(diff_agent):
+async def test_generate_diff_basic(diff_agent):
     base_files = {
         "file1.py": "print('Hello')\nprint('World')",
         "file2.py": "def foo():\n    return 1"
@@ -14,7 +18,7 @@ def test_generate_diff_basic(diff_agent):
         "file1.py": "print('Hello')\nprint('World!')",
         "file2.py": "def foo():\n    return 2"
     }
-    result = diff_agent.generate_diff(base_files, modified_files)
+    result = await diff_agent.generate_diff(base_files, modified_files)
     
     assert result.files_changed == 2
     file1_diff = next((f for f in result.file_diffs if f.path == "file1.py"), None)
@@ -22,9 +26,53 @@ def test_generate_diff_basic(diff_agent):
     assert "World!" in file1_diff.diff_text
     assert "files changed" in result.summary
 
-def test_generate_diff_added_removed(diff_agent):
+async def test_generate_diff_added_removed(diff_agent):
     base_files = {"main.py": "print(1)"}
     modified_files = {"main.py": "print(1)", "new.py": "print('new file')"}
-    result = diff_agent.generate_diff(base_files, modified_files)
+    result = await diff_agent.generate_diff(base_files, modified_files)
     assert result.files_changed == 1 or result.files_changed == 2
     assert result.lines_added >= 1
+
+async def test_generate_diff_in_process_pool_matches_inline(diff_agent, monkeypatch):
+    base_files = {f"f{i}.py": f"x = {i}\ny = 0" for i in range(10)}
+    modified_files = {f"f{i}.py": f"x = {i}\ny = 1" for i in range(9)}
+    modified_files["same.py"] = base_files["same.py"] = "unchanged"
+    inline = await diff_agent.generate_diff(base_files, modified_files)
+
+    monkeypatch.setattr(diff_agent_module, "PARALLEL_DIFF_MIN_FILES", 2)
+    try:
+        pooled = await diff_agent.generate_diff(base_files, modified_files)
+    finally:
+        diff_agent_module.shutdown_diff_pool()
+    assert diff_agent_module._diff_pool is None
+
+    assert (pooled.files_changed, pooled.lines_added, pooled.lines_removed) == (10, 9, 11)
+    assert pooled.summary == inline.summary
+    assert sorted(f.path for f in pooled.file_diffs) == sorted(f.path for f in inline.file_diffs)
+
+
+def test_diff_pool_spawns_workers_without_forkserver(monkeypatch):
+    monkeypatch.setattr(diff_agent_module.multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    monkeypatch.setattr(diff_agent_module, "_diff_pool", None)
+    try:
+        pool = diff_agent_module._get_diff_pool()
+        assert pool._mp_context.get_start_method() == "spawn"
+    finally:
+        diff_agent_module.shutdown_diff_pool()
+
+
+@pytest.mark.parametrize("a,b", [
+    ("", "a\nb"),
+    ("a\nb", ""),
+    ("\n".join(map(str, range(30))), "\n".join(map(str, range(2, 25))) + "\nx\n3"),
+    ("a\nb\nc", "a\nB\nc\nd"),
+    ("", "only"),
+    ("gone", ""),
+])
+def test_unified_diff_matches_difflib(a, b):
+    a, b = a.splitlines(), b.splitlines()
+    expected = list(difflib.unified_diff(a, b, fromfile="base/f", tofile="mod/f", lineterm=""))
+    lines, added, removed = diff_tools.unified_diff(a, b, "base/f", "mod/f")
+    assert lines == expected
+    assert added == sum(1 for line in expected[2:] if line.startswith("+"))
+    assert removed == sum(1 for line in expected[2:] if line.startswith("-"))
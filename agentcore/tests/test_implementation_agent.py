@@ -0,0 +1,121 @@
+import asyncio
+import re
+
+import pytest
+
+from repofactor.application.agent_service.implementation_agent import ImplementationAgent
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeClient:
+    """Fake Lightning client that tracks how many calls overlap"""
+
+    def __init__(self, fail_on=None, drop_from_batch=0, unchanged=()):
+        self.fail_on = fail_on
+        self.drop_from_batch = drop_from_batch
+        self.unchanged = unchanged
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+        self.forgotten = []
+
+    async def generate(self, prompt, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if self.fail_on and self.fail_on in prompt:
+            raise RuntimeError("LLM failure")
+        if "Code:\n" in prompt:
+            return _Response(prompt.rsplit("Code:\n", 1)[1] + "\n# modified")
+        # Batch prompt: echo every file back modified, minus any dropped ones
+        files = re.findall(r"<<<FILE (.+?)>>>\n(.*?)\n<<<END FILE>>>", prompt, re.DOTALL)
+        files = [f for f in files if f[0] != "<path>"]
+        kept = files[:len(files) - self.drop_from_batch]
+        return _Response("\n".join(
+            f"<<<UNCHANGED {path}>>>" if path in self.unchanged
+            else f"<<<FILE {path}>>>\n{code}\n# modified\n<<<END FILE>>>"
+            for path, code in kept
+        ))
+
+    def forget_reply(self, response):
+        self.forgotten.append(response)
+
+
+@pytest.mark.asyncio
+async def test_implement_changes_runs_files_concurrently(tmp_path):
+    client = _FakeClient()
+    agent = ImplementationAgent(client, max_concurrency=2, batch_size=1)
+    repo_content = {str(tmp_path / f"f{i}.py"): f"x = {i}" for i in range(5)}
+
+    result = await agent.implement_changes(repo_content, "modify")
+
+    assert result.success
+    assert [f.path for f in result.modified_files] == list(repo_content)
+    assert client.max_active == 2
+    assert [open(f.backup_path).read() for f in result.modified_files] == list(repo_content.values())
+
+
+@pytest.mark.asyncio
+async def test_implement_changes_collects_per_file_errors(tmp_path):
+    client = _FakeClient(fail_on="broken")
+    agent = ImplementationAgent(client)
+    repo_content = {
+        str(tmp_path / "ok.py"): "x = 1",
+        str(tmp_path / "bad.py"): "broken = True",
+    }
+
+    result = await agent.implement_changes(repo_content, "modify")
+
+    assert not result.success
+    assert [f.path for f in result.modified_files] == [str(tmp_path / "ok.py")]
+    assert result.errors[0].file_path == str(tmp_path / "bad.py")
+
+
+@pytest.mark.asyncio
+async def test_implement_changes_batches_files_into_one_call(tmp_path):
+    client = _FakeClient()
+    agent = ImplementationAgent(client)
+    repo_content = {str(tmp_path / f"f{i}.py"): f"x = {i}" for i in range(5)}
+
+    result = await agent.implement_changes(repo_content, "modify")
+
+    assert result.success
+    assert client.calls == 1
+    assert [f.modified_content for f in result.modified_files] == [
+        f"x = {i}\n# modified" for i in range(5)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_implement_changes_retries_files_missing_from_batch(tmp_path):
+    client = _FakeClient(drop_from_batch=2)
+    agent = ImplementationAgent(client)
+    repo_content = {str(tmp_path / f"f{i}.py"): f"x = {i}" for i in range(5)}
+
+    result = await agent.implement_changes(repo_content, "modify")
+
+    assert result.success
+    assert client.calls == 3
+    assert len(result.modified_files) == 5
+    assert len(client.forgotten) == 1  # The truncated batch reply isn't replayed
+
+
+@pytest.mark.asyncio
+async def test_implement_changes_accepts_unchanged_markers(tmp_path):
+    unchanged = str(tmp_path / "f1.py")
+    client = _FakeClient(unchanged={unchanged})
+    agent = ImplementationAgent(client)
+    repo_content = {str(tmp_path / f"f{i}.py"): f"x = {i}" for i in range(3)}
+
+    result = await agent.implement_changes(repo_content, "modify")
+
+    assert result.success
+    assert client.calls == 1
+    assert unchanged not in [f.path for f in result.modified_files]
+    assert f"No changes needed for file '{unchanged}'." in result.execution_logs
@@ -1,22 +1,62 @@
 """
-Simple test to verify Lightning AI works
+Simple test to verify the Lightning AI client flow (LitAI stubbed - no network)
 """
 
 import asyncio
-import os
-from dotenv import load_dotenv
-load_dotenv()
+import threading
+from unittest.mock import Mock, patch
 
+import pytest
+
+from repofactor.application.services import lightning_ai_service
 from repofactor.application.services.lightning_ai_service import LightningAIClient
 
+CANNED_REPLY = '{"message": "hello", "status": "ok"}'
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Stand-in for the shared LitAI LLM, returning a canned JSON reply"""
+    monkeypatch.setenv("LIGHTNING_API_KEY", "test-key")
+    llm = Mock(model="google/gemini-2.5-flash-lite-preview-06-17")
+    llm.chat.return_value = CANNED_REPLY
+    monkeypatch.setattr(lightning_ai_service, "diskcache", None)  # No on-disk reply cache
+    with patch.object(lightning_ai_service, "_shared_llm", return_value=llm):
+        yield llm
+
+
+class _DictCache(dict):
+    """In-memory stand-in for diskcache.Cache"""
+
+    def set(self, key, value, expire=None):
+        self[key] = value
+
+    def delete(self, key):
+        return self.pop(key, None) is not None
+
+
+def test_shared_llm_is_per_model_and_key(monkeypatch):
+    """Test: clients with different API keys never share an LLM"""
+    monkeypatch.setenv("LIGHTNING_API_KEY", "test-key")
+    monkeypatch.setattr(lightning_ai_service, "LLM", lambda model: Mock(model=model))
+    lightning_ai_service._shared_llm.cache_clear()
+    try:
+        first = LightningAIClient(api_key="key-a")
+        again = LightningAIClient(api_key="key-a")
+        other = LightningAIClient(api_key="key-b")
+    finally:
+        lightning_ai_service._shared_llm.cache_clear()
+
+    assert first.llm is again.llm
+    assert other.llm is not first.llm
+
 
-async def test_simple_prompt():
+async def test_simple_prompt(fake_llm):
     """Test with super simple prompt"""
-    
     client = LightningAIClient()
-    
+
     # ✅ Very simple prompt
-    simple_prompt = """You are a helpful assistant. 
+    simple_prompt = """You are a helpful assistant.
 
 Respond with ONLY this JSON (no other text):
 {
@@ -24,35 +64,117 @@ Respond with ONLY this JSON (no other text):
   "status": "ok"
 }
 """
-    
-    print("🧪 Testing Lightning AI with simple prompt...")
-    print(f"Prompt: {simple_prompt}")
-    print()
-    
+
     try:
         response = await client.generate(
             prompt=simple_prompt,
             max_tokens=100,
             temperature=0.1
         )
-        
-        print(f"✅ Response received!")
-        print(f"   Type: {type(response.text)}")
-        print(f"   Length: {len(response.text)}")
-        print(f"   Content: {response.text}")
-        
-        if response.text:
-            print("\n✅ SUCCESS - Lightning AI works!")
-        else:
-            print("\n❌ FAILED - Empty response even with simple prompt")
-            print("   This suggests an API or configuration issue")
-        
-    except Exception as e:
-        print(f"\n❌ ERROR: {e}")
-    
     finally:
         await client.close()
 
+    assert response.text == CANNED_REPLY
+    assert client.get_remaining_quota() == client.monthly_quota - 1
+    fake_llm.chat.assert_called_once()
+
+
+async def test_empty_reply_falls_back_to_second_prompt(fake_llm):
+    """Test: an empty reply triggers the fallback prompt"""
+    fake_llm.chat.side_effect = ["", CANNED_REPLY]
+    client = LightningAIClient()
+
+    response = await client.generate(prompt="toon prompt", prompt_fallback="json prompt")
+
+    assert response.text == CANNED_REPLY
+    assert [c.args[0] for c in fake_llm.chat.call_args_list] == ["toon prompt", "json prompt"]
+
+
+async def test_callable_fallback_is_only_rendered_when_needed(fake_llm):
+    """Test: a lazy fallback prompt is built only after the first attempt fails"""
+    rendered = []
+
+    def fallback():
+        rendered.append(True)
+        return "json prompt"
+
+    client = LightningAIClient()
+    await client.generate(prompt="toon prompt", prompt_fallback=fallback)
+    assert rendered == []
+
+    fake_llm.chat.side_effect = ["", CANNED_REPLY]
+    response = await client.generate(prompt="toon prompt", prompt_fallback=fallback)
+
+    assert response.text == CANNED_REPLY
+    assert rendered == [True]
+    assert fake_llm.chat.call_args.args[0] == "json prompt"
+
+
+async def test_cached_reply_skips_llm_and_quota(fake_llm):
+    """Test: an identical request is answered from the reply cache"""
+    client = LightningAIClient()
+    client._reply_cache = _DictCache()
+
+    first = await client.generate(prompt="toon prompt", max_tokens=100)
+    again = await client.generate(prompt="toon prompt", max_tokens=100)
+    await client.generate(prompt="toon prompt", max_tokens=200)
+
+    assert first.text == again.text == CANNED_REPLY
+    assert again.metadata == {"cached": True}
+    assert fake_llm.chat.call_count == 2
+    assert client.calls_made == 2
+
+
+async def test_forgotten_reply_is_not_served_again(fake_llm):
+    """Test: a reply the caller rejected is fetched again, not replayed"""
+    client = LightningAIClient()
+    client._reply_cache = _DictCache()
+
+    bad = await client.generate(prompt="toon prompt")
+    client.forget_reply(bad)
+    again = await client.generate(prompt="toon prompt")
+
+    assert again.metadata is None  # A fresh reply, not a cache hit
+    assert fake_llm.chat.call_count == 2
+
+
+async def test_forget_reply_survives_cache_errors(fake_llm):
+    """Test: a failing cache delete is logged, not raised"""
+    class _BrokenCache(_DictCache):
+        def delete(self, key):
+            raise OSError("database is locked")
+
+    client = LightningAIClient()
+    client._reply_cache = _BrokenCache()
+
+    response = await client.generate(prompt="toon prompt")
+    client.forget_reply(response)
+
+
+async def test_streaming_stop_does_not_wait_for_a_stalled_stream(fake_llm):
+    """Test: closing the stream early returns even if the model stalls"""
+    release = threading.Event()
+
+    def stalled_stream(*args, **kwargs):
+        yield "first"
+        release.wait(5)  # Model stops emitting
+        yield "late"
+
+    fake_llm.chat.side_effect = stalled_stream
+    client = LightningAIClient()
+    chunks = client.generate_streaming(prompt="p")
+    try:
+        assert await chunks.__anext__() == "first"
+        await asyncio.wait_for(chunks.aclose(), timeout=1)
+    finally:
+        release.set()
+    assert client.calls_made == 1
+
+
+async def test_empty_stream_does_not_use_quota(fake_llm):
+    """Test: a stream that produces nothing is not counted as a call"""
+    fake_llm.chat.side_effect = lambda *args, **kwargs: iter(())
+    client = LightningAIClient()
 
-if __name__ == "__main__":
-    asyncio.run(test_simple_prompt())
+    assert [chunk async for chunk in client.generate_streaming(prompt="p")] == []
+    assert client.calls_made == 0
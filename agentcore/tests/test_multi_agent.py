@@ -1,51 +1,164 @@
 import pytest
-from unittest.mock import AsyncMock, patch
+from repofactor.application.agent_service import multi_agent_orchestrator
+from repofactor.application.agent_service.multi_agent_orchestrator import MultiAgentOrchestrator
+from repofactor.application.services import repo_integrator_service
 from repofactor.application.services.repo_integrator_service import RepoIntegratorService
-from repofactor.domain.models.integration_models import AnalysisResult
+from repofactor.domain.models.integration_models import AnalysisResult, OrchestratorState
 
-@pytest.mark.asyncio
-@patch("repofactor.application.agent_service.multi_agent_orchestrator.MultiAgentOrchestrator.run_full_flow")
-@patch("repofactor.application.agent_service.analysis_agent.LightningAIClient")
-@patch("repofactor.application.services.repo_integrator_service.AgentCore")
-@patch("repofactor.application.services.repo_integrator_service.RepoService")
-async def test_analyze_repository_with_orchestrator(
-        mock_repo_service,
-        mock_agent_core,
-        mock_lightning_client,  # Mock LightningAIClient calls
-        mock_run_full_flow):
-    service = RepoIntegratorService()
-    service.repo_service = mock_repo_service
-    service.agent_core = mock_agent_core
-
-    # Mock git and API validations
-    mock_repo_service.api.is_valid_github_url.return_value = True
-    mock_repo_service.git.clone_repository = AsyncMock(
-        return_value=type("Meta", (), {"local_path": "/tmp/repo", "name": "repo"})
-    )
-    mock_repo_service.git.list_python_files.return_value = ["file1.py", "file2.py"]
-    mock_repo_service.git.read_multiple_files.return_value = {
-        "file1.py": "print('hello')",
-        "file2.py": "print('world')"
-    }
-
-    # Mock orchestrator full flow response
-    mock_run_full_flow.return_value = {
-        "analysis": {
-            "file_count": 2,
-            "affected_files": [
-                {"path": "file1.py", "reason": "test change", "confidence": 90, "changes": []},
-                {"path": "file2.py", "reason": "another change", "confidence": 95, "changes": []}
-            ],
-            "dependencies": [],
-            "risks": [],
-            "estimated_time": "1min",
-            "implementation_steps": []
-        },
-        "diff": {}
-    }
+FILES = {
+    "file1.py": "print('hello')",
+    "file2.py": "print('world')"
+}
+
+# Orchestrator full flow response
+FLOW_RESULT = {
+    "analysis": {
+        "file_count": 2,
+        "affected_files": [
+            {"path": "file1.py", "reason": "test change", "confidence": 90, "changes": []},
+            {"path": "file2.py", "reason": "another change", "confidence": 95, "changes": []}
+        ],
+        "dependencies": [],
+        "risks": [],
+        "estimated_time": "1min",
+        "implementation_steps": []
+    },
+    "diff": {}
+}
+
+
+# Plain fakes: cheaper than Mock/patch stacks and explicit about what is used
+
+class _FakeMeta:
+    local_path = "/tmp/repo"
+    name = "repo"
+    head_sha = None
+
+
+class _FakeApi:
+    def is_valid_github_url(self, url):
+        return True
+
+    def parse_repo_url(self, url):
+        return "test", "repo"
+
+    async def get_head_sha(self, owner, repo):
+        return None
+
+
+class _FakeGit:
+    async def clone_repository(self, repo_url, use_cache=True):
+        return _FakeMeta()
+
+    async def resolve_head_sha(self, repo_url):
+        return None
+
+    def list_python_files(self, repo_path):
+        return list(FILES)
+
+    async def read_multiple_files_async(self, repo_path, file_paths):
+        return {path: FILES[path] for path in file_paths}
+
+
+class _FakeRepoService:
+    def __init__(self):
+        self.api = _FakeApi()
+        self.git = _FakeGit()
+
+
+class _FakeOrchestrator:
+    def new_run(self):
+        return self
+
+    async def run_full_flow(self, repo_content_old, instructions):
+        return FLOW_RESULT
+
+
+class _FakeAgentCore:
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
 
+    def set_repo_path(self, repo_path):
+        self.repo_path = repo_path
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(repo_integrator_service, "MultiAgentOrchestrator", _FakeOrchestrator)
+    monkeypatch.setattr(repo_integrator_service, "AgentCore", _FakeAgentCore)
+    monkeypatch.setattr(repo_integrator_service, "diskcache", None)  # No ./cache/analysis writes
+    return RepoIntegratorService(repo_service=_FakeRepoService())
+
+
+@pytest.mark.asyncio
+async def test_analyze_repository_with_orchestrator(service):
     result = await service.analyze_repository("https://github.com/test/repo")
     assert isinstance(result, AnalysisResult)
     assert result.repo_url == "https://github.com/test/repo"
     assert result.repo_name == "repo"
     assert result.file_count == 2
+    assert service.agent_core.repo_path == "/tmp/repo"
+
+
+def test_new_run_gets_fresh_llm_agents_and_state(monkeypatch):
+    class _Client:
+        calls_made = 0
+
+    monkeypatch.setattr(multi_agent_orchestrator, "CodeAnalysisAgent", object)
+    monkeypatch.setattr(multi_agent_orchestrator, "LightningAIClient", _Client)
+    monkeypatch.setattr(multi_agent_orchestrator, "ImplementationAgent", lambda client: client)
+
+    base = MultiAgentOrchestrator.__new__(MultiAgentOrchestrator)  # Skip building real agents
+    base.analysis_agent = object()
+    base.implementation_agent = _Client()
+    base.implementation_agent.calls_made = 20  # Quota used up by earlier runs
+    base.research_agent = object()
+    base.state = OrchestratorState(approval_received=True, current_stage="diff_complete")
+    base.repo_content = FILES
+    base.instructions = "old"
+    base.latest_implementation_result = object()
+
+    run = base.new_run()
+
+    assert run.analysis_agent is not base.analysis_agent
+    assert run.implementation_agent.calls_made == 0
+    assert run.research_agent is base.research_agent
+    assert run.state == OrchestratorState()
+    assert base.state.current_stage == "diff_complete"
+    assert run.repo_content is None and run.latest_implementation_result is None
+
+
+@pytest.mark.asyncio
+async def test_result_cache_follows_upstream_head(service):
+    """A hit on the upstream HEAD skips the clone; a push re-fetches and misses"""
+    class _Cache(dict):
+        def set(self, key, value):
+            self[key] = value
+
+    clones = []
+    upstream = {"sha": "aaaaaaa111"}
+
+    class _Api(_FakeApi):
+        async def get_head_sha(self, owner, repo):
+            return upstream["sha"]
+
+    class _Git(_FakeGit):
+        async def clone_repository(self, repo_url, use_cache=True):
+            clones.append(use_cache)
+            meta = _FakeMeta()
+            meta.head_sha = "aaaaaaa"  # Abbreviated, as archive checkouts report it
+            return meta
+
+    service.repo_service.api = _Api()
+    service.repo_service.git = _Git()
+    service._result_cache = _Cache()
+
+    first = await service.analyze_repository("https://github.com/test/repo")
+    again = await service.analyze_repository("https://github.com/test/repo")
+    assert again is first
+    assert clones == [True]
+
+    upstream["sha"] = "bbbbbbb222"
+    await service.analyze_repository("https://github.com/test/repo")
+    assert clones == [True, True, False]
+    assert len(service._result_cache) == 2
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from repofactor.application.agent_service.research_agent import ResearchAgent
+from repofactor.domain.models.integration_models import ResearchResult, Solution
+
+
+class _FakeGemini:
+    """Counts research calls; errors mentioning 'unknown' find nothing"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def research_implementation_failure(self, error_message, failed_code, context):
+        self.calls += 1
+        await asyncio.sleep(0)
+        solutions = [] if "unknown" in error_message else [
+            Solution(
+                source="docs", url="https://example.com", title="Fix", description="fix it",
+                code_snippet="x = 1", confidence=0.9, search_query=error_message,
+            )
+        ]
+        return ResearchResult(
+            solutions_found=solutions,
+            recommendations=[],
+            search_queries_used=[],
+            total_sources=len(solutions),
+        )
+
+
+@pytest.mark.asyncio
+async def test_find_solution_reuses_identical_research():
+    gemini = _FakeGemini()
+    agent = ResearchAgent(gemini_agent=gemini)
+
+    first, concurrent = await asyncio.gather(
+        agent.find_solution("TypeError", "code", {"file": "a.py"}),
+        agent.find_solution("TypeError", "code", {"file": "a.py"}),
+    )
+    snippet, again = await agent.best_fix_snippet("TypeError", "code", {"file": "a.py"})
+    await agent.find_solution("TypeError", "code", {"file": "b.py"})
+
+    assert first is concurrent is again
+    assert snippet == "x = 1"
+    assert gemini.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_find_solution_does_not_keep_empty_results():
+    gemini = _FakeGemini()
+    agent = ResearchAgent(gemini_agent=gemini)
+
+    await agent.find_solution("unknown error", "code", {})
+    await agent.find_solution("unknown error", "code", {})
+
+    assert gemini.calls == 2
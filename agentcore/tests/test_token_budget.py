@@ -0,0 +1,25 @@
+from unittest.mock import patch
+
+from repofactor.utils import token_budget
+from repofactor.utils.token_budget import truncate_to_tokens
+
+
+class _WordEncoding:
+    """Fake encoder: one token per space-separated word"""
+
+    def encode(self, text, **kwargs):
+        return text.split(" ")
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+def test_truncate_to_tokens_uses_encoder():
+    with patch.object(token_budget, "get_encoding", return_value=_WordEncoding()):
+        assert truncate_to_tokens("a b c d e", 3) == "a b c"
+        assert truncate_to_tokens("a b", 3) == "a b"
+
+
+def test_truncate_to_tokens_falls_back_to_chars():
+    with patch.object(token_budget, "get_encoding", return_value=None):
+        assert truncate_to_tokens("x" * 100, 5) == "x" * 5 * token_budget.CHARS_PER_TOKEN
@@ -1,18 +1,32 @@
 import pytest
 from repofactor.application.agent_service.agent_orchestrator_decision import OrchestratorState, orchestrator_decide_next
 
-@pytest.mark.parametrize("state,expected_agent", [
-    (OrchestratorState(approval_received=False, current_stage="init", retry_count=0), "wait_for_approval"),
-    (OrchestratorState(approval_received=True, current_stage="init", retry_count=0), "analyzer_agent"),
-    (OrchestratorState(approval_received=True, current_stage="analysis_complete", retry_count=0), "implementation_agent"),
-    (OrchestratorState(approval_received=True, current_stage="implementation_failed", retry_count=2), "research_agent"),
-    (OrchestratorState(approval_received=True, current_stage="implementation_failed", retry_count=3), "report_failure"),
-    (OrchestratorState(approval_received=True, current_stage="implementation_complete", retry_count=0), "diff_agent"),
-    (OrchestratorState(approval_received=True, current_stage="diff_complete", retry_count=0), "summary_agent"),
-    (OrchestratorState(approval_received=True, current_stage="summary_complete", retry_count=0), "testing_agent"),
-    (OrchestratorState(approval_received=True, current_stage="testing_complete", retry_count=0), "finalize"),
-    (OrchestratorState(approval_received=True, current_stage="unknown", retry_count=0), "error"),
-])
+# (approval_received, current_stage, retry_count, expected_agent)
+_ROWS = (
+    (False, "init", 0, "wait_for_approval"),
+    (True, "init", 0, "analyzer_agent"),
+    (True, "analysis_complete", 0, "implementation_agent"),
+    (True, "implementation_failed", 2, "research_agent"),
+    (True, "implementation_failed", 3, "report_failure"),
+    (True, "implementation_complete", 0, "diff_agent"),
+    (True, "diff_complete", 0, "summary_agent"),
+    (True, "summary_complete", 0, "testing_agent"),
+    (True, "testing_complete", 0, "finalize"),
+    (True, "unknown", 0, "error"),
+)
+
+# States are built once at import and shared by every parametrized case
+_CASES = tuple(
+    (OrchestratorState(approval_received=a, current_stage=s, retry_count=r), expected)
+    for a, s, r, expected in _ROWS
+)
+
+
+@pytest.mark.parametrize(
+    "state,expected_agent",
+    _CASES,
+    ids=[f"{s}-retry{r}-{expected}" if a else f"no-approval-{expected}" for a, s, r, expected in _ROWS],
+)
 def test_orchestrator_decide_next(state, expected_agent):
     result = orchestrator_decide_next(state)
     assert result == expected_agent
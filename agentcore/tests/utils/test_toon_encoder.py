@@ -1,6 +1,6 @@
 # agentcore/tests/utils/test_toon_encoder.py
 import pytest
-from src.repofactor.utils.toon_encoder import encode_toon, ToonEncoder, encode_files_toon
+from src.repofactor.utils.toon_encoder import encode_toon, ToonEncoder, encode_files_toon, _quote_string
 
 def test_encode_primitives():
     """Test encoding of basic data types."""
@@ -92,3 +92,12 @@ def test_empty_structures():
     assert encode_toon({}) == ""
     assert encode_toon({"empty_list": []}) == "empty_list[0]:"
     assert encode_toon([]) == "[0]:"
+
+def test_repeat_file_encoding_hits_quote_cache():
+    """Re-encoding the same file bodies reuses memoized quoting."""
+    files = {"main.py": "import os\nprint(os.getcwd())\n"}
+    first = encode_files_toon(files)
+
+    hits = _quote_string.cache_info().hits
+    assert encode_files_toon(files) == first
+    assert _quote_string.cache_info().hits > hits
@@ -6,19 +6,31 @@ import asyncio
 
 # Add src to Python path
 project_root = Path(__file__).resolve().parent
-sys.path.insert(0, str(project_root / 'src'))
+src_path = str(project_root / 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an event loop for the test session"""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 
-def pytest_sessionfinish(session, exitstatus):
-    """Cleanup after all tests"""
-    # Give time for cleanup
-    import time
-    time.sleep(0.5)
+if uvloop is not None:
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests on uvloop when it is installed (as uvicorn does)"""
+        return {"uvloop": uvloop.new_event_loop}
+
+
+_real_sleep = asyncio.sleep
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    """Make asyncio.sleep (incl. tenacity retry back-off) yield without waiting"""
+    async def instant_sleep(delay=0, result=None):
+        return await _real_sleep(0, result)
+
+    monkeypatch.setattr(asyncio, "sleep", instant_sleep)
 
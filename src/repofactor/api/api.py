@@ -1,23 +1,63 @@
-from fastapi import FastAPI, Request
+from typing import Any
+import json
+
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel
 import uvicorn
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 from repofactor.application.agent_service.multi_agent_orchestrator import MultiAgentOrchestrator
 
+# orjson decodes large payloads (file contents, prompts) several times faster
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
 orchestrator = MultiAgentOrchestrator()
 app = FastAPI()
 
+
+class AgentRunResponse(BaseModel):
+    result: str
+    received: Any
+
+
 @app.get("/agent/status")
 async def agent_status():
     return {"status": "Agent is running", "health": "OK"}
 
 @app.post("/agent/run")
-async def agent_run(request: Request):
-    payload = await request.json()
+async def agent_run(request: Request) -> AgentRunResponse:
+    # Raw body + orjson instead of request.json() (stdlib json); the typed
+    # return lets FastAPI serialize the response through Pydantic directly.
+    # Python callers can send compact msgpack bodies instead of JSON.
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(MSGPACK_CONTENT_TYPE):
+        if msgpack is None:
+            raise HTTPException(status_code=415, detail="msgpack bodies need the msgpack package")
+        try:
+            payload = msgpack.unpackb(body, raw=False)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="Request body must be valid msgpack") from e
+    else:
+        try:
+            payload = _json_loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="Request body must be valid JSON") from e
     # כאן תקרא ל-Flow שלך; אפשר לייבא orchestrator ולהפעיל אותו
     # לדוג':
     # from repofactor.application.agent_service.multi_agent_orchestrator import MultiAgentOrchestrator
     # orchestrator = MultiAgentOrchestrator()
     # result = await orchestrator.run_full_flow(...)
-    return {"result": "Flow executed", "received": payload}
+    return AgentRunResponse(result="Flow executed", received=payload)
 
 if __name__ == "__main__":
     uvicorn.run("api:app", host="127.0.0.1", port=8000, reload=True)
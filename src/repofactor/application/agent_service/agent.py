@@ -1,18 +1,19 @@
-import os
 from typing import List
 import difflib
+import sys
+
+from repofactor.infrastructure.utils.file_tools import iter_python_files
 
 class AgentCore:
     def __init__(self, repo_path: str):
         self.repo_path = repo_path
 
+    def set_repo_path(self, repo_path: str) -> None:
+        """Point this agent at another repository without rebuilding it"""
+        self.repo_path = repo_path
+
     def list_py_files(self) -> List[str]:
-        py_files = []
-        for root, _, files in os.walk(self.repo_path):
-            for file in files:
-                if file.endswith(".py"):
-                    py_files.append(os.path.join(root, file))
-        return py_files
+        return list(iter_python_files(self.repo_path))
 
     def analyze_dependencies(self):
         pass
@@ -30,7 +31,8 @@ class AgentCore:
         diff = difflib.unified_diff(
             old_code.splitlines(), new_code.splitlines(), lineterm=""
         )
-        print('\n'.join(diff))
+        # Stream the generator instead of joining the whole diff into one string
+        sys.stdout.writelines(line + "\n" for line in diff)
 
 if __name__ == "__main__":
     agent = AgentCore(repo_path=".")
@@ -1,33 +1,26 @@
 from repofactor.domain.models.integration_models import OrchestratorState
 
 
+# Stage -> next agent for every stage without extra conditions
+_STAGE_TABLE = {
+    "init": "analyzer_agent",
+    "analysis_complete": "implementation_agent",
+    "implementation_complete": "diff_agent",
+    "diff_complete": "summary_agent",
+    "summary_complete": "testing_agent",
+    "testing_complete": "finalize",
+}
+
+
 def orchestrator_decide_next(state: OrchestratorState) -> str:
     """Decide which agent to call next"""
 
     if not state.approval_received:
         return "wait_for_approval"
-    if state.current_stage == "init":
-        return "analyzer_agent"
-    
-    elif state.current_stage == "analysis_complete":
-        return "implementation_agent"
-    
-    elif state.current_stage == "implementation_failed":
+
+    if state.current_stage == "implementation_failed":
         if state.retry_count < 3:
             return "research_agent"  # Try to find solutions
-        else:
-            return "report_failure"
-    
-    elif state.current_stage == "implementation_complete":
-        return "diff_agent"
-    
-    elif state.current_stage == "diff_complete":
-        return "summary_agent"
-    
-    elif state.current_stage == "summary_complete":
-        return "testing_agent"
-    
-    elif state.current_stage == "testing_complete":
-        return "finalize"
-    
-    return "error"
+        return "report_failure"
+
+    return _STAGE_TABLE.get(state.current_stage, "error")
@@ -3,21 +3,277 @@
 Code Analysis Agent - using Lightning AI directly with TOON format
 """
 
+import asyncio
+import copy
+import functools
+import hashlib
 import logging
-from typing import Dict, Any, Optional, List
+import os
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Any, Optional, List, Tuple
 import json
 import re
 
-from pydantic import BaseModel, Field
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from pydantic import BaseModel, Field, ValidationError
 
 from repofactor.domain.prompts.prompt_agent_analyze import (
     PROMPT_REPO_ANALYSIS_TOON,
     PROMPT_REPO_ANALYSIS,
+    REPO_ANALYSIS_SYSTEM_PROMPT,
+    REPO_ANALYSIS_FILES_TOKEN_BUDGET,
+    REPO_ANALYSIS_MAX_FILE_TOKENS,
 )
-from repofactor.application.services.lightning_ai_service import LightningAIClient
+from repofactor.application.services.lightning_ai_service import LightningAIClient, LightningResponse
 
 logger = logging.getLogger(__name__)
 
+# orjson parses LLM replies several times faster; its JSONDecodeError
+# subclasses json.JSONDecodeError, so callers handle both the same way
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Files per analysis prompt: as many as the prompt's file budget holds at the
+# full per-file allowance (24), so a normal selection (max_files=10) is one
+# LLM call that sees every file. Only larger inputs are split into batches,
+# which run concurrently.
+ANALYSIS_BATCH_SIZE = REPO_ANALYSIS_FILES_TOKEN_BUDGET // REPO_ANALYSIS_MAX_FILE_TOKENS
+
+_json_decoder = json.JSONDecoder()
+
+# Replies longer than this are parsed in a worker thread
+PARSE_IN_THREAD_THRESHOLD = 64 * 1024
+
+# Finished analyses, shared by all agents in the process (LRU, exact match)
+ANALYSIS_CACHE_SIZE = 128
+_PARSE_FAILURE_RISK = "Failed to parse LLM response"
+_analysis_cache: "OrderedDict[Tuple[bool, str], Dict[str, Any]]" = OrderedDict()
+
+
+def _content_digest(content: str) -> bytes:
+    """
+    Fixed-size digest of one file's text.
+    
+    Not memoized: a lookup on freshly read text would hash and compare it
+    in full anyway, and a memo would keep every file body alive.
+    """
+    return hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _analysis_key(
+    model: str,
+    repo_content: Dict[str, str],
+    target_context: Optional[str],
+    user_instructions: str
+) -> str:
+    """Digest of everything that determines an analysis result"""
+    h = hashlib.blake2b(digest_size=16)
+    paths = sorted(repo_content)
+    for part in (model, target_context or "", user_instructions, *paths):
+        data = part.encode("utf-8", "surrogatepass")
+        h.update(len(data).to_bytes(8, "little"))  # Length prefix keeps parts unambiguous
+        h.update(data)
+    for path in paths:
+        h.update(_content_digest(repo_content[path]))  # Fixed size, no prefix needed
+    return h.hexdigest()
+
+# Rendered prompts (LRU). Filled from worker threads, hence the lock
+PROMPT_CACHE_SIZE = 64
+_prompt_cache: "OrderedDict[str, str]" = OrderedDict()
+_prompt_cache_lock = threading.Lock()
+
+
+def _render_prompt(
+    render: Callable[..., str],
+    repo_content: Dict[str, str],
+    target_context: Optional[str],
+    user_instructions: str
+) -> str:
+    """
+    Render an analysis prompt, reusing an earlier rendering of the same input.
+    
+    Args:
+        render: PROMPT_REPO_ANALYSIS_TOON or PROMPT_REPO_ANALYSIS
+        repo_content: Files to include in the prompt
+        target_context: Optional extra context
+        user_instructions: What the user asked for
+    
+    Returns:
+        The prompt text (role and JSON rules live in the system prompt)
+    """
+    key = _analysis_key(render.__name__, repo_content, target_context, user_instructions)
+    with _prompt_cache_lock:
+        prompt = _prompt_cache.get(key)
+        if prompt is not None:
+            _prompt_cache.move_to_end(key)
+            return prompt
+    
+    prompt = render(
+        instructions=user_instructions,
+        relevant_files=repo_content,
+        target_context=target_context,
+        split_system=True
+    )
+    with _prompt_cache_lock:
+        _prompt_cache[key] = prompt
+        if len(_prompt_cache) > PROMPT_CACHE_SIZE:
+            _prompt_cache.popitem(last=False)
+    return prompt
+
+# Reply parsing pattern, compiled once
+_FENCED_JSON_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL)
+
+
+class _JsonObjectScanner:
+    """
+    Locate top-level {...} objects in text fed piece by piece.
+    
+    State carries over between feeds, so a streamed reply is scanned once in
+    total. Braces inside JSON strings are ignored and nesting depth is
+    unlimited; there is no regex backtracking, so malformed replies stay O(n).
+    """
+    
+    def __init__(self):
+        self.depth = 0
+        self.start = 0
+        self.in_string = False
+        self.escaped = False
+        self.offset = 0  # Length of all text fed so far
+    
+    def feed(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Scan the next piece of text.
+        
+        Returns:
+            (start, end) bounds, relative to all text fed so far, of each
+            object that closed within this piece
+        """
+        spans = []
+        depth, start = self.depth, self.start
+        in_string, escaped = self.in_string, self.escaped
+        offset = self.offset
+        
+        for i, ch in enumerate(text, offset):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == '\\':
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '{':
+                if depth == 0:
+                    start = i
+                depth += 1
+            elif depth:
+                # Quotes and closing braces only matter inside an object
+                if ch == '"':
+                    in_string = True
+                elif ch == '}':
+                    depth -= 1
+                    if depth == 0:
+                        spans.append((start, i + 1))
+        
+        self.depth, self.start = depth, start
+        self.in_string, self.escaped = in_string, escaped
+        self.offset = offset + len(text)
+        return spans
+
+
+def _find_json_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Locate top-level {...} objects in free text with one linear scan.
+    
+    Args:
+        text: LLM reply that may embed JSON among prose
+    
+    Returns:
+        (start, end) slice bounds of each balanced object, in order
+    """
+    return _JsonObjectScanner().feed(text)
+
+
+_ANALYSIS_KEYS = ("affected_files", "dependencies", "main_modules")
+
+
+async def _read_until_analysis_object(chunks: AsyncIterator[str]) -> str:
+    """
+    Collect streamed reply text until the analysis object is complete.
+    
+    Stops at the first top-level object that decodes to a dict with an
+    analysis field, so the caller can end generation early; otherwise
+    returns the whole stream.
+    
+    Args:
+        chunks: Async iterator of response text fragments
+    
+    Returns:
+        The text received so far
+    """
+    scanner = _JsonObjectScanner()
+    buf = ""
+    async for chunk in chunks:
+        buf += chunk
+        for start, end in scanner.feed(chunk):
+            try:
+                obj = _json_loads(buf[start:end])
+            except json.JSONDecodeError:
+                continue
+            if isinstance(obj, dict) and any(k in obj for k in _ANALYSIS_KEYS):
+                return buf
+    return buf
+
+
+async def _iter_json_array_items(
+    chunks: AsyncIterator[str],
+    key: str
+) -> AsyncIterator[Any]:
+    """
+    Incrementally yield the elements of the `key` array in streamed JSON text.
+    
+    Each element is decoded as soon as its closing bracket arrives, so callers
+    can act on it while the rest of the response is still being generated.
+    Text around the object (markdown fences, prose) is ignored.
+    
+    Args:
+        chunks: Async iterator of response text fragments
+        key: Name of the array field to extract
+    
+    Returns:
+        Async iterator of decoded array elements
+    """
+    buf = ""
+    pos = -1  # Index just past '[' once the array has been found
+    marker = f'"{key}"'
+    
+    async for chunk in chunks:
+        buf += chunk
+        
+        if pos < 0:
+            start = buf.find(marker)
+            bracket = buf.find("[", start + len(marker)) if start >= 0 else -1
+            if bracket < 0:
+                continue
+            pos = bracket + 1
+        
+        while True:
+            # Skip separators between elements
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                return
+            try:
+                item, pos = _json_decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # Element not complete yet - wait for more text
+            yield item
+
 
 # ============================================================================
 # Pydantic Models (for validation)
@@ -52,14 +308,31 @@ class CodeAnalysisAgent:
     
     def __init__(
         self,
-        model: str = "google/gemini-2.5-flash-lite-preview-06-17"
+        model: str = "google/gemini-2.5-flash-lite-preview-06-17",
+        stream_replies: Optional[bool] = None,
+        keep_raw: Optional[bool] = None
     ):
-        """Initialize with Lightning AI client."""
+        """
+        Initialize with Lightning AI client.
+        
+        Args:
+            model: Lightning AI model id
+            stream_replies: Stream each analysis reply and stop generating as
+                soon as the JSON object is complete (bypasses the reply cache);
+                defaults to the REPOFACTOR_STREAM_REPLIES=1 environment setting
+            keep_raw: Return the full LLM text as raw_llm_response (debugging);
+                defaults to the REPOFACTOR_KEEP_RAW=1 environment setting
+        """
         self.client = LightningAIClient(model=model)
         self.model = model
+        if stream_replies is None:
+            stream_replies = os.getenv("REPOFACTOR_STREAM_REPLIES", "0") == "1"
+        self.stream_replies = stream_replies
+        if keep_raw is None:
+            keep_raw = os.getenv("REPOFACTOR_KEEP_RAW", "0") == "1"
+        self.keep_raw = keep_raw
         
-        logger.info(f"✅ CodeAnalysisAgent: Lightning AI with TOON format")
-        logger.info(f"   Model: {model}")
+        logger.info(f"✅ CodeAnalysisAgent: Lightning AI with TOON format (model {model})")
     
     async def analyze_repository(
         self,
@@ -67,70 +340,219 @@ class CodeAnalysisAgent:
         target_context: Optional[str] = None,
         user_instructions: str = ""
     ) -> Dict[str, Any]:
-        """Analyze repository and return structured results."""
+        """
+        Analyze repository and return structured results.
+        
+        Up to ANALYSIS_BATCH_SIZE files share one prompt. Larger inputs are
+        split into batches that are analyzed concurrently and merged.
+        Identical requests (same model, files, context, instructions and
+        keep_raw) are answered from an in-process LRU cache without calling
+        the LLM, and
+        an empty repo_content gets an empty analysis without any call.
+        """
+        if not repo_content:
+            logger.info("No files to analyze, skipping LLM call")
+            result = RepositoryAnalysisSchema().model_dump()
+            result["raw_llm_response"] = None
+            return result
         
-        # Generate TOON-formatted prompt (compact!)
-        prompt_toon = PROMPT_REPO_ANALYSIS_TOON(
-            instructions=user_instructions,
-            relevant_files=repo_content,
-            target_context=target_context
+        # keep_raw is part of the key: the cache is shared by every agent, and
+        # raw_llm_response must match what this agent asked for
+        key = (
+            self.keep_raw,
+            _analysis_key(self.model, repo_content, target_context, user_instructions)
         )
-
-        # Generate standard JSON prompt as a fallback
-        prompt_json = PROMPT_REPO_ANALYSIS(
-            instructions=user_instructions,
-            relevant_files=repo_content,
-            target_context=target_context
+        cached = _analysis_cache.get(key)
+        if cached is not None:
+            _analysis_cache.move_to_end(key)
+            logger.info("♻️ Reusing cached analysis for identical request")
+            return copy.deepcopy(cached)
+        
+        result = await self._analyze_uncached(repo_content, target_context, user_instructions)
+        
+        # Don't pin a failed parse - the next attempt may well succeed
+        if _PARSE_FAILURE_RISK not in result.get("risks", ()):
+            _analysis_cache[key] = copy.deepcopy(result)
+            if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+                _analysis_cache.popitem(last=False)
+        return result
+    
+    async def _analyze_uncached(
+        self,
+        repo_content: Dict[str, str],
+        target_context: Optional[str],
+        user_instructions: str
+    ) -> Dict[str, Any]:
+        """Run the (possibly batched) LLM analysis"""
+        items = list(repo_content.items())
+        if len(items) <= ANALYSIS_BATCH_SIZE:
+            return await self._analyze_batch(repo_content, target_context, user_instructions)
+        
+        batches = [
+            dict(items[i:i + ANALYSIS_BATCH_SIZE])
+            for i in range(0, len(items), ANALYSIS_BATCH_SIZE)
+        ]
+        logger.info(f"Analyzing {len(items)} files in {len(batches)} batches")
+        
+        results = await asyncio.gather(*(
+            self._analyze_batch(batch, target_context, user_instructions)
+            for batch in batches
+        ))
+        return self._merge_results(results)
+    
+    async def analyze_repositories_batch(
+        self,
+        jobs: List[Dict[str, Any]]
+    ) -> List[Any]:
+        """
+        Run several independent analyses concurrently.
+        
+        Args:
+            jobs: Keyword arguments for analyze_repository, one dict per job
+                (repo_content, and optionally target_context / user_instructions)
+        
+        Returns:
+            One result per job, in order; a failed job yields its exception
+            instead of cancelling the others
+        """
+        return await asyncio.gather(
+            *(self.analyze_repository(**job) for job in jobs),
+            return_exceptions=True
         )
+    
+    async def stream_affected_files(
+        self,
+        repo_content: Dict[str, str],
+        target_context: Optional[str] = None,
+        user_instructions: str = ""
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream validated affected files while the LLM is still responding.
         
-        # Enhanced logging
-        logger.info(f"📊 Prompt stats:")
-        logger.info(f"   Length: {len(prompt_toon)} chars (~{len(prompt_toon)//4} tokens)")
-        logger.info(f"   Files: {len(repo_content)}")
-        logger.info(f"   Format: TOON (compact, 30-60% fewer tokens)")
-        logger.debug(f"Prompt preview: {prompt_toon[:300]}...")
+        Batches are streamed one after another; a file already reported by
+        an earlier batch is skipped. Malformed entries are logged and dropped.
+        """
+        items = list(repo_content.items())
+        seen_paths = set()
         
-        try:
-            # Call Lightning AI with fallback
-            logger.info("🔄 Calling Lightning AI...")
-            
-            response = await self.client.generate(
-                prompt=prompt_toon,
-                prompt_fallback=prompt_json,
+        for i in range(0, len(items), ANALYSIS_BATCH_SIZE):
+            prompt = await asyncio.to_thread(
+                _render_prompt,
+                PROMPT_REPO_ANALYSIS_TOON,
+                dict(items[i:i + ANALYSIS_BATCH_SIZE]),
+                target_context,
+                user_instructions
+            )
+            chunks = self.client.generate_streaming(
+                prompt=prompt,
+                system_prompt=REPO_ANALYSIS_SYSTEM_PROMPT,
                 max_tokens=3000,
                 temperature=0.1
             )
+            try:
+                async for raw in _iter_json_array_items(chunks, "affected_files"):
+                    try:
+                        file_info = AffectedFileSchema.model_validate(raw).model_dump()
+                    except ValidationError as e:
+                        logger.warning(f"Skipping malformed affected file: {e}")
+                        continue
+                    if file_info["path"] not in seen_paths:
+                        seen_paths.add(file_info["path"])
+                        yield file_info
+            finally:
+                # Stop the underlying stream once the array is done (or we are)
+                await chunks.aclose()
+    
+    @staticmethod
+    def _merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine per-batch analyses: concatenate files, de-duplicate lists"""
+        merged: Dict[str, Any] = {
+            "main_modules": [],
+            "dependencies": [],
+            "affected_files": [],
+            "risks": [],
+            "implementation_steps": []
+        }
+        seen_paths = set()
+        for result in results:
+            for key in ("main_modules", "dependencies", "risks", "implementation_steps"):
+                merged[key].extend(v for v in result.get(key, []) if v not in merged[key])
+            for file_info in result.get("affected_files", []):
+                if file_info["path"] not in seen_paths:
+                    seen_paths.add(file_info["path"])
+                    merged["affected_files"].append(file_info)
+        
+        raw = [r.get("raw_llm_response") for r in results]
+        merged["raw_llm_response"] = "\n\n".join(r or "" for r in raw) if any(raw) else None
+        return merged
+    
+    async def _analyze_batch(
+        self,
+        repo_content: Dict[str, str],
+        target_context: Optional[str],
+        user_instructions: str
+    ) -> Dict[str, Any]:
+        """Analyze one batch of files with a single LLM call."""
+        
+        # Encoding and token truncation are CPU work; build the prompt in a
+        # worker so concurrent batches keep the event loop free for LLM I/O
+        prompt_toon = await asyncio.to_thread(
+            _render_prompt, PROMPT_REPO_ANALYSIS_TOON,
+            repo_content, target_context, user_instructions
+        )
+        # The JSON prompt is only rendered if the TOON attempt fails
+        prompt_json = functools.partial(
+            _render_prompt, PROMPT_REPO_ANALYSIS,
+            repo_content, target_context, user_instructions
+        )
+        
+        # One record per step; skip the formatting when nobody listens
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"📊 Prompt stats: {len(prompt_toon)} chars (~{len(prompt_toon)//4} tokens), "
+                f"{len(repo_content)} files, TOON format - calling Lightning AI..."
+            )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Prompt preview: {prompt_toon[:300]}...")
+        
+        try:
+            response = await self._generate_reply(prompt_toon, prompt_json)
+            response_text = response.text
             
             # Comprehensive response validation
-            logger.info(f"✅ Response received")
-            logger.info(f"   Type: {type(response)}")
-            logger.info(f"   Text length: {len(response.text) if response.text else 0} chars")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"✅ Response received ({len(response_text) if response_text else 0} chars)")
             
-            if not response.text or not response.text.strip():
-                logger.error("❌ Empty response from Lightning AI!")
-                logger.error(f"   Prompt length: {len(prompt_toon)} chars")
-                logger.error(f"   JSON fallback length: {len(prompt_json)}")
-                logger.error(f"   Files: {len(repo_content)}")
-                
+            if not response_text or not response_text.strip():
                 # Log first file for debugging
-                if repo_content:
-                    first_file = next(iter(repo_content.keys()))
-                    logger.error(f"   First file: {first_file} ({len(repo_content[first_file])} chars)")
-                
+                first_file = next(iter(repo_content), None)
+                logger.error(
+                    f"❌ Empty response from Lightning AI! Prompt: {len(prompt_toon)} chars, "
+                    f"files: {len(repo_content)}"
+                    + (f", first file: {first_file} ({len(repo_content[first_file])} chars)"
+                       if first_file is not None else "")
+                )
                 raise ValueError("Empty response from Lightning AI - prompt may be too long")
             
-            logger.debug(f"Response preview: {response.text[:500]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Response preview: {response_text[:500]}...")
             
-            # Parse with robust logic
-            parsed = self._parse_llm_response(response.text)
-            
-            # Validate with Pydantic
-            validated = RepositoryAnalysisSchema(**parsed)
+            # Parse with robust logic, then validate with Pydantic (v2 core
+            # validates the dict in one pass). An unusable reply must not be
+            # replayed from the LLM reply cache - the next attempt may succeed.
+            try:
+                parsed = await self._parse_llm_response(response_text)
+                validated = RepositoryAnalysisSchema.model_validate(parsed)
+            except Exception:
+                self.client.forget_reply(response)
+                raise
+            if _PARSE_FAILURE_RISK in validated.risks:
+                self.client.forget_reply(response)
             
             result = validated.model_dump()
             
-            # Add raw response for debugging
-            result['raw_llm_response'] = response.text
+            # Raw response only on request - it can be as large as the prompt
+            result['raw_llm_response'] = response_text if self.keep_raw else None
             
             logger.info(
                 f"✅ Analysis complete: {len(result['affected_files'])} files, "
@@ -149,7 +571,55 @@ class CodeAnalysisAgent:
             logger.error(f"Analysis failed: {e}", exc_info=True)
             raise RuntimeError(f"Repository analysis failed: {str(e)}")
     
-    def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
+    async def _generate_reply(
+        self, prompt: str, prompt_fallback: Callable[[], str]
+    ) -> LightningResponse:
+        """
+        Get the reply for one analysis prompt.
+        
+        With stream_replies, the reply is streamed and generation stops once
+        the analysis object is complete; a failed or empty stream falls back
+        to a regular call (which also tries prompt_fallback).
+        """
+        if self.stream_replies:
+            chunks = self.client.generate_streaming(
+                prompt=prompt,
+                system_prompt=REPO_ANALYSIS_SYSTEM_PROMPT,
+                max_tokens=3000,
+                temperature=0.1
+            )
+            try:
+                text = await _read_until_analysis_object(chunks)
+                if text.strip():
+                    return LightningResponse(text=text, model=self.model)
+                logger.warning("Empty streamed reply, retrying without streaming")
+            except Exception as e:
+                logger.warning(f"Streaming failed, retrying without streaming: {e}")
+            finally:
+                await chunks.aclose()
+        
+        response = await self.client.generate(
+            prompt=prompt,
+            prompt_fallback=prompt_fallback,
+            system_prompt=REPO_ANALYSIS_SYSTEM_PROMPT,
+            max_tokens=3000,
+            temperature=0.1
+        )
+        return response
+    
+    async def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
+        """
+        Parse an LLM reply without stalling the event loop.
+        
+        Short replies are parsed inline; long ones (over
+        PARSE_IN_THREAD_THRESHOLD chars) are scanned in a worker thread so
+        concurrent batches keep making progress.
+        """
+        if response_text and len(response_text) > PARSE_IN_THREAD_THRESHOLD:
+            return await asyncio.to_thread(self._parse_sync, response_text)
+        return self._parse_sync(response_text)
+    
+    def _parse_sync(self, response_text: str) -> Dict[str, Any]:
         """
         Robust JSON parsing with multiple strategies.
         
@@ -163,80 +633,84 @@ class CodeAnalysisAgent:
             "main_modules": [],
             "dependencies": [],
             "affected_files": [],
-            "risks": ["Failed to parse LLM response"],
+            "risks": [_PARSE_FAILURE_RISK],
             "implementation_steps": []
         }
         
-        if not response_text or not response_text.strip():
+        stripped = response_text.strip() if response_text else ""
+        if not stripped:
             logger.error("Empty LLM response")
             return default
         
-        # Strategy 1: Direct JSON parse
-        try:
-            result = json.loads(response_text.strip())
-            logger.info("✅ Parsed JSON directly")
-            return self._fill_defaults(result)
-        except json.JSONDecodeError:
-            logger.debug("Not direct JSON")
+        # Fast path: no object anywhere (plain-text errors, refusals) - every
+        # strategy below needs a '{', so skip the scans entirely
+        if '{' not in stripped:
+            logger.warning(f"⚠️ No JSON object in response: {stripped[:200]}")
+            return default
+        
+        # Strategy 1: Direct JSON parse (only worth trying on a bare object)
+        if stripped[0] == '{' and stripped[-1] == '}':
+            try:
+                result = _json_loads(stripped)
+                logger.info("✅ Parsed JSON directly")
+                return self._fill_defaults(result)
+            except json.JSONDecodeError:
+                logger.debug("Not direct JSON")
         
         # Strategy 2: Extract from markdown code block
-        match = re.search(r'``````', response_text, re.DOTALL)
+        match = _FENCED_JSON_RE.search(response_text)
         if match:
             try:
-                result = json.loads(match.group(1))
-                logger.info("✅ Extracted JSON from markdown block")
-                return self._fill_defaults(result)
+                result = _json_loads(match.group(1))
+                if isinstance(result, dict):
+                    logger.info("✅ Extracted JSON from markdown block")
+                    return self._fill_defaults(result)
             except json.JSONDecodeError:
                 logger.debug("Markdown block not valid JSON")
         
         # Strategy 3: Find any JSON object in text
-        matches = list(re.finditer(
-            r'\{(?:[^{}]|(?:\{(?:[^{}]|(?:\{[^{}]*\}))*\}))*\}',
-            response_text,
-            re.DOTALL
-        ))
+        spans = _find_json_spans(response_text)
         
         # Sort by length (longest first) - likely to be the main object
-        matches.sort(key=lambda m: len(m.group(0)), reverse=True)
+        spans.sort(key=lambda span: span[1] - span[0], reverse=True)
         
-        for match in matches:
+        for start, end in spans:
             try:
-                result = json.loads(match.group(0))
+                result = _json_loads(response_text[start:end])
                 # Check if it looks like our expected structure
-                if any(k in result for k in ["affected_files", "dependencies", "main_modules"]):
+                if any(k in result for k in _ANALYSIS_KEYS):
                     logger.info("✅ Extracted JSON from text")
                     return self._fill_defaults(result)
             except json.JSONDecodeError:
                 continue
         
-        logger.warning("⚠️ Could not parse JSON, returning default structure")
-        logger.warning(f"Response preview: {response_text[:200]}")
+        logger.warning(f"⚠️ Could not parse JSON, returning default structure. Response preview: {response_text[:200]}")
         return default
     
     def _fill_defaults(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Ensure all required fields exist with proper types"""
         
-        result = {
+        raw_files = data.get("affected_files", [])
+        if not isinstance(raw_files, list):
+            raw_files = []
+        
+        return {
             "main_modules": data.get("main_modules", []),
             "dependencies": data.get("dependencies", []),
-            "affected_files": [],
+            # Validate and normalize affected_files in one pass
+            "affected_files": [
+                {
+                    "path": str(f["path"]),
+                    "reason": str(f.get("reason", "")),
+                    "confidence": int(f.get("confidence", 50)),
+                    "changes": f.get("changes", [])
+                }
+                for f in raw_files
+                if isinstance(f, dict) and "path" in f
+            ],
             "risks": data.get("risks", []),
             "implementation_steps": data.get("implementation_steps", [])
         }
-        
-        # Validate and normalize affected_files
-        raw_files = data.get("affected_files", [])
-        if isinstance(raw_files, list):
-            for file_info in raw_files:
-                if isinstance(file_info, dict) and "path" in file_info:
-                    result["affected_files"].append({
-                        "path": str(file_info.get("path", "")),
-                        "reason": str(file_info.get("reason", "")),
-                        "confidence": int(file_info.get("confidence", 50)),
-                        "changes": file_info.get("changes", [])
-                    })
-        
-        return result
     
     async def close(self):
         """Cleanup resources"""
@@ -1,15 +1,16 @@
 # src/repofactor/application/agent_service/diff_agent.py
 
-from typing import List
-import difflib
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import asyncio
+import multiprocessing
+
+from repofactor.utils.diff_tools import FileDiff, diff_file
 
-class FileDiff:
-    def __init__(self, path: str, diff_text: str, change_summary: List[str]):
-        self.path = path
-        self.diff_text = diff_text
-        self.change_summary = change_summary
 
 class DiffResult:
+    __slots__ = ("files_changed", "lines_added", "lines_removed", "file_diffs", "summary")
+
     def __init__(self, files_changed: int, lines_added: int, lines_removed: int,
                  file_diffs: List[FileDiff], summary: str):
         self.files_changed = files_changed
@@ -18,6 +19,37 @@ class DiffResult:
         self.file_diffs = file_diffs
         self.summary = summary
 
+# Changed files needed before diffs are spread over worker processes;
+# below that, pickling and process start-up cost more than they save
+PARALLEL_DIFF_MIN_FILES = 8
+
+_diff_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_diff_pool() -> ProcessPoolExecutor:
+    """
+    Process pool shared by all DiffAgents, created on first use
+
+    Workers come from a forkserver rather than a plain fork: forking the
+    server process while its thread pools and event loop are running can
+    deadlock the children on locks held by other threads. Where there is
+    no forkserver (Windows), they are spawned.
+    """
+    global _diff_pool
+    if _diff_pool is None:
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _diff_pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context(method))
+    return _diff_pool
+
+
+def shutdown_diff_pool() -> None:
+    """Stop the shared diff workers (call on application shutdown)"""
+    global _diff_pool
+    if _diff_pool is not None:
+        _diff_pool.shutdown(wait=False, cancel_futures=True)
+        _diff_pool = None
+
+
 class DiffAgent:
     """
     Agent that computes diffs between two sets of files.
@@ -26,34 +58,45 @@ class DiffAgent:
         # any setup here
         pass
 
-    def generate_diff(self, base_files: dict, modified_files: dict) -> DiffResult:
+    async def generate_diff(self, base_files: dict, modified_files: dict) -> DiffResult:
+        """
+        Diff every file present in either set.
+        
+        Identical texts are skipped before splitting lines, and files on
+        only one side need no matching, so they are diffed inline. Sequence
+        matching is CPU-bound and holds the GIL, so with
+        PARALLEL_DIFF_MIN_FILES or more edited files it runs in a process
+        pool; fewer run in a thread.
+        """
+        one_sided = [(path, base_files[path], "") for path in base_files.keys() - modified_files.keys()]
+        one_sided += [(path, "", modified_files[path]) for path in modified_files.keys() - base_files.keys()]
+        edited = [
+            (path, base_files[path], modified_files[path])
+            for path in base_files.keys() & modified_files.keys()
+            if base_files[path] != modified_files[path]
+        ]
+
+        results = [diff_file(*args) for args in one_sided]
+        if len(edited) >= PARALLEL_DIFF_MIN_FILES:
+            loop = asyncio.get_running_loop()
+            pool = _get_diff_pool()
+            results += await asyncio.gather(*(
+                loop.run_in_executor(pool, diff_file, *args) for args in edited
+            ))
+        elif edited:
+            results += await asyncio.to_thread(lambda: [diff_file(*args) for args in edited])
+
         file_diffs = []
-        files_changed = 0
         lines_added = 0
         lines_removed = 0
-
-        all_files = set(base_files.keys()) | set(modified_files.keys())
-        for path in all_files:
-            original = base_files.get(path, "").splitlines()
-            modified = modified_files.get(path, "").splitlines()
-            if original != modified:
-                diff = list(difflib.unified_diff(
-                    original, modified,
-                    fromfile=f"base/{path}",
-                    tofile=f"mod/{path}",
-                    lineterm=""
-                ))
-                added = sum(1 for line in diff if line.startswith('+') and not line.startswith('+++'))
-                removed = sum(1 for line in diff if line.startswith('-') and not line.startswith('---'))
-                summary = []
-                if not original: summary.append("File Added")
-                elif not modified: summary.append("File Removed")
-                else: summary.append(f"Lines Changed: {len(diff)}")
-                file_diffs.append(FileDiff(path, "\n".join(diff), summary))
-                files_changed += 1
-                lines_added += added
-                lines_removed += removed
+        for result in results:
+            if result is None:
+                continue
+            file_diff, added, removed = result
+            file_diffs.append(file_diff)
+            lines_added += added
+            lines_removed += removed
+        files_changed = len(file_diffs)
 
         summary = f"{files_changed} files changed, {lines_added} lines added, {lines_removed} lines removed"
         return DiffResult(files_changed, lines_added, lines_removed, file_diffs, summary)
-
@@ -1,17 +1,48 @@
 from typing import Dict, List
-import copy
+import asyncio
+import functools
 import logging
+import re
+
+try:
+    import aiofiles
+except ImportError:
+    aiofiles = None
+
 from repofactor.application.services.lightning_ai_service import (
     LightningAIClient,
     LightningModel
 )
 from repofactor.domain.models.integration_models import ImplementationResult, ModifiedFile, Error
+from repofactor.domain.prompts.prompt_agent_analyze import PROMPT_BATCH_MODIFY
 
 logger = logging.getLogger(__name__)
 
+# Files are independent, so their LLM calls are overlapped up to this limit
+MAX_CONCURRENT_FILES = 8
+
+# Files packed into one LLM request - one call per batch instead of per file
+BATCH_SIZE = 10
+
+_BATCH_FILE_RE = re.compile(r"<<<FILE (.+?)>>>\n(.*?)\n?<<<END FILE>>>", re.DOTALL)
+_BATCH_UNCHANGED_RE = re.compile(r"<<<UNCHANGED (.+?)>>>")
+
+
+@functools.lru_cache(maxsize=32)
+def _file_prompt_header(instructions: str) -> str:
+    """Single-file prompt up to the code; shared by every file of a run"""
+    return f"Modify this code according to: {instructions}\n\nCode:\n"
+
 class ImplementationAgent:
-    def __init__(self, ai_client: LightningAIClient):
+    def __init__(
+        self,
+        ai_client: LightningAIClient,
+        max_concurrency: int = MAX_CONCURRENT_FILES,
+        batch_size: int = BATCH_SIZE
+    ):
         self.ai_client = ai_client
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
 
     def _backup_file(self, file_path: str, content: str) -> str:
         # Create a backup of original content (e.g. save to a .bak file)
@@ -25,10 +56,90 @@ class ImplementationAgent:
             logger.error(f"Failed to create backup for {file_path}: {e}")
             return ""
 
-    def implement_changes(self, repo_content: Dict[str, str], instructions: str) -> ImplementationResult:
+    async def _backup_file_async(self, file_path: str, content: str) -> str:
+        """
+        Write the backup without blocking the event loop
+        
+        Uses aiofiles when installed, otherwise writes in a worker thread.
+        """
+        if aiofiles is None:
+            return await asyncio.to_thread(self._backup_file, file_path, content)
+        
+        backup_path = file_path + ".bak"
+        try:
+            async with aiofiles.open(backup_path, "w", encoding="utf-8") as f:
+                await f.write(content)
+            logger.info(f"Backup created for {file_path} at {backup_path}")
+            return backup_path
+        except Exception as e:
+            logger.error(f"Failed to create backup for {file_path}: {e}")
+            return ""
+
+    async def _generate_file(
+        self, sem: asyncio.Semaphore, original: str, instructions: str
+    ) -> str:
+        """Ask the AI client for the modified version of a single file."""
+        # Build prompt for AI code generation
+        prompt = _file_prompt_header(instructions) + original
+        async with sem:
+            response = await self.ai_client.generate(prompt)
+            return response.text
+
+    async def _generate_batch(
+        self, sem: asyncio.Semaphore, files: Dict[str, str], instructions: str
+    ) -> Dict[str, object]:
+        """
+        Modify several files with a single LLM call.
+
+        The model names unchanged files instead of repeating them. Files
+        missing from the reply (e.g. a truncated response) or a failed
+        batch call fall back to one call per file.
+
+        Returns:
+            Dict mapping each path to its new code, or the exception it raised.
+        """
+        if len(files) == 1:
+            [(path, original)] = files.items()
+            try:
+                return {path: await self._generate_file(sem, original, instructions)}
+            except Exception as e:
+                return {path: e}
+
+        results: Dict[str, object] = {}
+        response = None
+        try:
+            async with sem:
+                response = await self.ai_client.generate(PROMPT_BATCH_MODIFY(instructions, files))
+            for path, code in _BATCH_FILE_RE.findall(response.text):
+                if path in files:
+                    results[path] = code
+            # Unchanged files are only named, so their code isn't echoed back
+            for path in _BATCH_UNCHANGED_RE.findall(response.text):
+                if path in files and path not in results:
+                    results[path] = files[path]
+        except Exception as e:
+            logger.warning(f"Batch of {len(files)} files failed, retrying per file: {e}")
+
+        missing = [path for path in files if path not in results]
+        if missing and response is not None:
+            # Don't let the reply cache replay a truncated reply
+            self.ai_client.forget_reply(response)
+        if missing:
+            logger.info(f"{len(missing)} file(s) missing from batch reply, generating individually")
+            retried = await asyncio.gather(
+                *(self._generate_file(sem, files[path], instructions) for path in missing),
+                return_exceptions=True
+            )
+            results.update(zip(missing, retried, strict=True))
+
+        return results
+
+    async def implement_changes(self, repo_content: Dict[str, str], instructions: str) -> ImplementationResult:
         """
         Implements code changes based on the given instructions.
         Uses AI client to generate changes, creates backups, and logs.
+        Files are sent batch_size at a time in one LLM request each; batches
+        run concurrently, bounded by max_concurrency.
 
         Args:
             repo_content: Dict mapping file paths to their original content.
@@ -42,25 +153,45 @@ class ImplementationAgent:
         logs = []
         success = True
 
-        current_content = copy.deepcopy(repo_content)
+        sem = asyncio.Semaphore(self.max_concurrency)
+        paths = list(repo_content)
+        step = max(1, self.batch_size)
+        batches = [
+            {path: repo_content[path] for path in paths[i:i + step]}
+            for i in range(0, len(paths), step)
+        ]
+        generated: Dict[str, object] = {}
+        for batch_result in await asyncio.gather(
+            *(self._generate_batch(sem, batch, instructions) for batch in batches)
+        ):
+            generated.update(batch_result)
+
+        # Write all backups concurrently, off the event loop
+        changed = [
+            path for path in paths
+            if not isinstance(generated[path], Exception)
+            and generated[path] and generated[path] != repo_content[path]
+        ]
+        backup_paths = dict(zip(changed, await asyncio.gather(
+            *(self._backup_file_async(path, repo_content[path]) for path in changed)
+        ), strict=True))
 
-        for path, original in repo_content.items():
+        for path in paths:
+            modified = generated[path]
+            original = repo_content[path]
             try:
-                # Build prompt for AI code generation
-                prompt = f"Modify this code according to: {instructions}\n\nCode:\n{original}"
-                modified = self.ai_client.generate_code(prompt)  # Replace with async if needed
+                if isinstance(modified, Exception):
+                    raise modified
 
                 if modified and modified != original:
-                    backup_path = self._backup_file(path, original)
                     modified_file = ModifiedFile(
                         path=path,
                         original_content=original,
                         modified_content=modified,
-                        backup_path=backup_path,
+                        backup_path=backup_paths[path],
                         changes_made=[f"Modified according to instructions."]
                     )
                     modified_files.append(modified_file)
-                    current_content[path] = modified
                     logs.append(f"File '{path}' modified successfully.")
                 else:
                     logs.append(f"No changes needed for file '{path}'.")
@@ -1,3 +1,5 @@
+import copy
+
 from repofactor.application.agent_service.analysis_agent import CodeAnalysisAgent
 from repofactor.application.agent_service.agent_orchestrator_decision import orchestrator_decide_next
 from repofactor.domain.models.integration_models import OrchestratorState
@@ -24,6 +26,25 @@ class MultiAgentOrchestrator:
         # self.validator_agent = ValidatorAgent()
         # self.doc_agent = DocAgent()
 
+    def new_run(self) -> "MultiAgentOrchestrator":
+        """
+        Orchestrator with fresh flow state for one analysis.
+        
+        The LLM-backed agents are rebuilt so each run gets its own
+        LightningAIClient quota, as when every analysis built a new
+        orchestrator; that is cheap because the LitAI LLMs behind them are
+        shared per model. The diff and research agents keep no per-run
+        state, so the Gemini model and the research memo are shared.
+        """
+        run = copy.copy(self)
+        run.analysis_agent = CodeAnalysisAgent()
+        run.implementation_agent = ImplementationAgent(LightningAIClient())
+        run.state = OrchestratorState()
+        run.repo_content = None
+        run.instructions = None
+        run.latest_implementation_result = None
+        return run
+
     def get_next_agent_name(self):
         return orchestrator_decide_next(self.state)
 
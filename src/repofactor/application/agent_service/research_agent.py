@@ -1,6 +1,8 @@
 import os
 import asyncio
+import hashlib
 import logging
+from collections import OrderedDict
 from typing import Optional, Dict, Tuple
 
 import google.generativeai as genai
@@ -18,6 +20,23 @@ from repofactor.domain.prompts.prompt_research_agnet import (
 
 logger = logging.getLogger(__name__)
 
+# Research results remembered per ResearchAgent (LRU), so a retry that fails
+# the same way doesn't repeat the Gemini call
+RESEARCH_CACHE_SIZE = 128
+
+
+def _research_key(error_message: str, failed_code: str, context: Dict[str, str]) -> str:
+    """Digest of everything a research request is built from"""
+    h = hashlib.blake2b(digest_size=16)
+    parts = [error_message, failed_code]
+    for key, value in sorted(context.items()):
+        parts += (str(key), str(value))
+    for part in parts:
+        data = part.encode("utf-8", "surrogatepass")
+        h.update(len(data).to_bytes(8, "little"))  # Length prefix keeps parts unambiguous
+        h.update(data)
+    return h.hexdigest()
+
 
 class GeminiResearchAgent:
     """Low-level Gemini integration used by the higher-level ResearchAgent.
@@ -30,6 +49,7 @@ class GeminiResearchAgent:
         self._api_key = api_key
         self._model_name = model_name
         self._model: Optional[genai.GenerativeModel] = None
+        self._generation_config: Optional[genai.types.GenerationConfig] = None
 
     def _ensure_client(self) -> None:
         """Configure Gemini client on first use.
@@ -47,6 +67,11 @@ class GeminiResearchAgent:
             model_name=self._model_name,
             tools="google_search_retrieval",
         )
+        self._generation_config = genai.types.GenerationConfig(
+            temperature=0.2,
+            top_p=0.8,
+            max_output_tokens=2048,
+        )
         logger.info("Initialized Gemini Research Agent with %s", self._model_name)
 
     async def research_implementation_failure(
@@ -59,15 +84,16 @@ class GeminiResearchAgent:
         self._ensure_client()
         prompt = build_research_prompt(error_message, failed_code, context)
         try:
-            response = await asyncio.to_thread(
-                self._model.generate_content,
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.2,
-                    top_p=0.8,
-                    max_output_tokens=2048,
-                ),
-            )
+            # Prefer the SDK's native async call; older SDKs only have the sync one
+            generate_async = getattr(self._model, "generate_content_async", None)
+            if generate_async is not None:
+                response = await generate_async(prompt, generation_config=self._generation_config)
+            else:
+                response = await asyncio.to_thread(
+                    self._model.generate_content,
+                    prompt,
+                    generation_config=self._generation_config,
+                )
             solutions: list[Solution] = parse_grounded_response(response)
             search_queries = extract_search_queries(response)
             recommendations = generate_recommendations(solutions, error_message, context)
@@ -98,6 +124,7 @@ class ResearchAgent:
 
     def __init__(self, gemini_agent: Optional[GeminiResearchAgent] = None) -> None:
         self._gemini = gemini_agent or GeminiResearchAgent()
+        self._cache: "OrderedDict[str, asyncio.Task]" = OrderedDict()
 
     async def find_solution(
         self,
@@ -105,12 +132,40 @@ class ResearchAgent:
         failed_code: str,
         context: Dict[str, str],
     ) -> ResearchResult:
-        """Run research and return a structured ResearchResult."""
-        return await self._gemini.research_implementation_failure(
-            error_message=error_message,
-            failed_code=failed_code,
-            context=context,
-        )
+        """Run research and return a structured ResearchResult.
+
+        Identical requests share one Gemini call, including concurrent ones.
+        Results without solutions (or errors) are not kept, so the next
+        attempt asks again.
+        """
+        key = _research_key(error_message, failed_code, context)
+        task = self._cache.get(key)
+        if task is not None:
+            self._cache.move_to_end(key)
+            logger.info("Reusing research for identical failure")
+        else:
+            task = asyncio.ensure_future(self._gemini.research_implementation_failure(
+                error_message=error_message,
+                failed_code=failed_code,
+                context=context,
+            ))
+            self._cache[key] = task
+            if len(self._cache) > RESEARCH_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+        try:
+            result = await asyncio.shield(task)
+        except Exception:
+            self._forget(key, task)
+            raise
+        if not result.solutions_found:
+            self._forget(key, task)
+        return result
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        """Drop a cached research task (unless it was already replaced)"""
+        if self._cache.get(key) is task:
+            del self._cache[key]
 
     async def best_fix_snippet(
         self,
@@ -5,19 +5,107 @@ Works with local filesystem
 """
 import sys
 import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+_SRC_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+if _SRC_ROOT not in sys.path:  # idempotent across reloads
+    sys.path.insert(0, _SRC_ROOT)
 import shutil
 import tempfile
+import zipfile
+import re
+import functools
+import time
+from urllib.parse import quote
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Optional, List
 import asyncio
 from dataclasses import dataclass
 import logging
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+try:
+    import aiofiles
+except ImportError:
+    aiofiles = None
+
 from repofactor.infrastructure.utils.cleanup_tools import cleanup_folder
+from repofactor.infrastructure.utils.file_tools import DEFAULT_EXCLUDED_DIRS, iter_python_files
 
 logger = logging.getLogger(__name__)
 
+GITHUB_API_URL = "https://api.github.com"
+ARCHIVE_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+LIST_CACHE_MAX = 32  # (repo, mtime) listings kept per service
+
+# GitHub zipballs unpack to "<owner>-<repo>-<short sha>/"
+_ARCHIVE_SHA_RE = re.compile(r"-([0-9a-f]{7,40})$")
+
+# `git ls-remote --symref <url> HEAD` prints "ref: refs/heads/<branch>\tHEAD"
+_SYMREF_HEAD_RE = re.compile(r"^ref: refs/heads/(\S+)\tHEAD$", re.MULTILINE)
+
+
+def extract_zip_safely(archive_path: str, dest: str) -> str:
+    """
+    Extract a zip archive into dest, rejecting members that would land
+    outside of it (Zip Slip).
+    
+    Returns:
+        The archive's single top-level directory if it has one, else dest
+    """
+    base = os.path.realpath(dest)
+    with zipfile.ZipFile(archive_path) as archive:
+        for name in archive.namelist():
+            target = os.path.realpath(os.path.join(dest, name))
+            if not target.startswith(base + os.sep):
+                raise ValueError(f"Unsafe path in archive: {name}")
+        archive.extractall(dest)
+    
+    entries = os.listdir(dest)
+    if len(entries) == 1 and os.path.isdir(os.path.join(dest, entries[0])):
+        return os.path.join(dest, entries[0])
+    return dest
+
+
+def read_head_sha(repo_path: str) -> Optional[str]:
+    """
+    Resolve the commit sha HEAD points at by reading .git directly
+    
+    Returns:
+        The sha, or None if repo_path is not a git checkout
+    """
+    git_dir = os.path.join(repo_path, ".git")
+    try:
+        with open(os.path.join(git_dir, "HEAD"), encoding="utf-8") as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    
+    if not head.startswith("ref:"):
+        return head or None
+    
+    ref = head[4:].strip()
+    try:
+        with open(os.path.join(git_dir, ref), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        pass
+    
+    # Shallow clones often keep refs only in packed-refs
+    try:
+        with open(os.path.join(git_dir, "packed-refs"), encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
 
 @dataclass
 class RepoMetadata:
@@ -26,6 +114,7 @@ class RepoMetadata:
     repo_url: str
     owner: str
     name: str
+    head_sha: Optional[str] = None
     
     def cleanup(self):
         """Remove cloned repo"""
@@ -44,9 +133,15 @@ class GitOperationsService:
     - Working with local code
     """
     
-    def __init__(self, cache_dir: Optional[str] = None):
+    def __init__(self, cache_dir: Optional[str] = None, cache_ttl: Optional[float] = None):
         self.cache_dir = cache_dir or os.getenv("REPO_CACHE_DIR", "./cache/repos")
         os.makedirs(self.cache_dir, exist_ok=True)
+        # Seconds before a cached checkout is re-fetched (None = never)
+        ttl = cache_ttl if cache_ttl is not None else os.getenv("REPO_CACHE_TTL")
+        self.cache_ttl = float(ttl) if ttl else None
+        self._resolved_repos: Dict[str, Path] = {}
+        self._list_cache: "OrderedDict[tuple, List[str]]" = OrderedDict()
+        self._list_cache_lock = threading.Lock()
     
     def cleanup_cache(self, days_old: int = 7) -> List[str]:
         """Clean old cached repositories"""
@@ -61,15 +156,20 @@ class GitOperationsService:
         self,
         repo_url: str,
         use_cache: bool = True,
-        branch: str = "main"
+        branch: Optional[str] = None
     ) -> RepoMetadata:
         """
         Clone repository with optional caching
         
+        GitHub repos are fetched as a single zip archive of the branch tip,
+        which is much faster than negotiating a git clone. Other hosts, or
+        archive failures, fall back to a shallow git clone.
+        
         Args:
             repo_url: GitHub URL
-            use_cache: Use cached version if exists
-            branch: Branch to clone (default: main)
+            use_cache: Use cached version if it exists and is within cache_ttl
+            branch: Branch to clone (default: repo's default branch); each
+                branch is cached separately
         
         Returns:
             RepoMetadata with local path
@@ -84,55 +184,44 @@ class GitOperationsService:
         owner, repo_name = self._extract_repo_info(repo_url)
         
         # Check cache
-        cache_path = os.path.join(self.cache_dir, owner, repo_name)
-        if use_cache and os.path.exists(cache_path):
+        cache_path = self._cache_path(owner, repo_name, branch)
+        if use_cache and self._is_cache_fresh(cache_path):
             logger.info(f"Using cached repo: {cache_path}")
             return RepoMetadata(
                 local_path=cache_path,
                 repo_url=repo_url,
                 owner=owner,
-                name=repo_name
+                name=repo_name,
+                head_sha=self._load_head_sha(cache_path)
             )
         
-        # Clone to temp, then move to cache
-        temp_dir = tempfile.mkdtemp(prefix="repo_clone_")
+        # Clone to temp, then move to cache. The temp dir lives inside the
+        # cache so the final move is a rename rather than a cross-device copy.
+        temp_dir = await asyncio.to_thread(
+            functools.partial(tempfile.mkdtemp, prefix=".repo_clone_", dir=self.cache_dir)
+        )
         
         try:
-            from git import Repo
-            
-            logger.info(f"Cloning {repo_url}")
-            
-            # Run in executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            
-            def do_clone():
+            checkout_dir = None
+            if httpx is not None and "github.com" in repo_url:
                 try:
-                    Repo.clone_from(
-                        repo_url,
-                        temp_dir,
-                        depth=1,
-                        branch=branch
-                    )
+                    logger.info(f"Downloading archive of {owner}/{repo_name}")
+                    checkout_dir = await self._download_archive(owner, repo_name, branch, temp_dir)
                 except Exception as e:
-                    # Try 'master' if 'main' fails
-                    if branch == "main":
-                        logger.info("Trying 'master' branch")
-                        Repo.clone_from(
-                            repo_url,
-                            temp_dir,
-                            depth=1,
-                            branch="master"
-                        )
-                    else:
-                        raise
+                    logger.info(f"Archive download failed, falling back to git clone: {e}")
+                    await asyncio.to_thread(shutil.rmtree, temp_dir, True)
+                    await asyncio.to_thread(os.makedirs, temp_dir)
             
-            await loop.run_in_executor(None, do_clone)
+            if checkout_dir is None:
+                await self._git_clone(repo_url, temp_dir, branch)
+                checkout_dir = temp_dir
+                head_sha = read_head_sha(checkout_dir)
+            else:
+                match = _ARCHIVE_SHA_RE.search(os.path.basename(checkout_dir))
+                head_sha = match.group(1) if match else None
             
-            # Move to cache
-            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-            if os.path.exists(cache_path):
-                shutil.rmtree(cache_path)
-            shutil.move(temp_dir, cache_path)
+            # Move to cache (filesystem work stays off the event loop)
+            await asyncio.to_thread(self._install_checkout, checkout_dir, cache_path, head_sha)
             
             logger.info(f"Cached at: {cache_path}")
             
@@ -140,14 +229,172 @@ class GitOperationsService:
                 local_path=cache_path,
                 repo_url=repo_url,
                 owner=owner,
-                name=repo_name
+                name=repo_name,
+                head_sha=head_sha
             )
         
         except Exception as e:
             logger.error(f"Clone failed: {e}")
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
             raise
+        
+        finally:
+            if os.path.exists(temp_dir):
+                await asyncio.to_thread(shutil.rmtree, temp_dir, True)
+    
+    def _install_checkout(self, checkout_dir: str, cache_path: str, head_sha: Optional[str]) -> None:
+        """Move a finished checkout into cache_path, replacing any older copy"""
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        
+        # Swap the old copy aside first so cache_path is only briefly missing;
+        # deleting a large tree is the slow part and happens afterwards
+        stale = None
+        if os.path.exists(cache_path):
+            stale = tempfile.mkdtemp(prefix=".repo_stale_", dir=self.cache_dir)
+            os.rename(cache_path, os.path.join(stale, "old"))
+        
+        shutil.move(checkout_dir, cache_path)
+        self._save_head_sha(cache_path, head_sha)
+        
+        if stale:
+            shutil.rmtree(stale, ignore_errors=True)
+    
+    def _cache_path(self, owner: str, repo_name: str, branch: Optional[str]) -> str:
+        """Cache location for a checkout; each branch gets its own entry"""
+        name = repo_name if not branch else f"{repo_name}@{quote(branch, safe='')}"
+        return os.path.join(self.cache_dir, owner, name)
+    
+    def _is_cache_fresh(self, cache_path: str) -> bool:
+        """Whether a cached checkout exists and is younger than cache_ttl"""
+        try:
+            age = time.time() - os.path.getmtime(cache_path)
+        except OSError:
+            return False
+        return self.cache_ttl is None or age < self.cache_ttl
+    
+    @staticmethod
+    def _save_head_sha(cache_path: str, head_sha: Optional[str]) -> None:
+        """Record the checkout's sha next to it (zip checkouts have no .git)"""
+        sha_file = cache_path + ".sha"
+        if head_sha:
+            with open(sha_file, "w", encoding="utf-8") as f:
+                f.write(head_sha)
+        elif os.path.exists(sha_file):
+            os.remove(sha_file)
+    
+    @staticmethod
+    def _load_head_sha(cache_path: str) -> Optional[str]:
+        """Sha of a cached checkout, from its sidecar file or its .git dir"""
+        try:
+            with open(cache_path + ".sha", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except OSError:
+            return read_head_sha(cache_path)
+    
+    async def _download_archive(
+        self,
+        owner: str,
+        repo_name: str,
+        branch: Optional[str],
+        dest: str
+    ) -> str:
+        """
+        Stream the GitHub zipball of branch into dest and extract it
+        
+        Returns:
+            Path of the extracted source tree
+        """
+        url = f"{GITHUB_API_URL}/repos/{owner}/{repo_name}/zipball"
+        if branch:
+            url += f"/{branch}"
+        
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": "RepoIntegrator/1.0"
+        }
+        token = os.getenv("GITHUB_TOKEN")
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        
+        archive_path = os.path.join(dest, "archive.zip")
+        async with httpx.AsyncClient(follow_redirects=True, timeout=60.0) as client:
+            async with client.stream("GET", url, headers=headers) as response:
+                response.raise_for_status()
+                f = await asyncio.to_thread(open, archive_path, "wb")
+                try:
+                    async for chunk in response.aiter_bytes(ARCHIVE_CHUNK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+                finally:
+                    await asyncio.to_thread(f.close)
+        
+        return await asyncio.to_thread(
+            extract_zip_safely, archive_path, os.path.join(dest, "src")
+        )
+    
+    async def _git_clone(self, repo_url: str, dest: str, branch: Optional[str]) -> None:
+        """Shallow, blobless, tagless git clone of repo_url into dest"""
+        logger.info(f"Cloning {repo_url}")
+        
+        try:
+            await self._run_git_clone(repo_url, dest, branch)
+        except RuntimeError:
+            # 'main' was assumed: ask the remote for its real default branch
+            # (one ref lookup) rather than guessing 'master' with another clone
+            if branch != "main":
+                raise
+            default_branch = await self._resolve_default_branch(repo_url)
+            if not default_branch or default_branch == branch:
+                raise
+            logger.info(f"Trying default branch '{default_branch}'")
+            await asyncio.to_thread(shutil.rmtree, dest, True)
+            await self._run_git_clone(repo_url, dest, default_branch)
+    
+    @staticmethod
+    async def _resolve_default_branch(repo_url: str) -> Optional[str]:
+        """Default branch of a remote via `git ls-remote --symref`, or None"""
+        proc = await asyncio.create_subprocess_exec(
+            "git", "ls-remote", "--symref", "--", repo_url, "HEAD",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        out, _ = await proc.communicate()
+        if proc.returncode:
+            return None
+        match = _SYMREF_HEAD_RE.search(out.decode(errors="replace"))
+        return match.group(1) if match else None
+    
+    @staticmethod
+    async def resolve_head_sha(repo_url: str) -> Optional[str]:
+        """Commit SHA of a remote's HEAD via `git ls-remote`, or None"""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "git", "ls-remote", "--", repo_url, "HEAD",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:  # e.g. no git binary on this host
+            logger.debug(f"git ls-remote unavailable: {e}")
+            return None
+        out, _ = await proc.communicate()
+        if proc.returncode or not out:
+            return None
+        return out.split(None, 1)[0].decode() or None
+    
+    @staticmethod
+    async def _run_git_clone(repo_url: str, dest: str, branch: Optional[str]) -> None:
+        """Run `git clone` as an async subprocess, raising RuntimeError on failure"""
+        args = ["git", "clone", "--depth=1", "--filter=blob:none", "--single-branch", "--no-tags"]
+        if branch:
+            args += ["--branch", branch]
+        args += ["--", repo_url, dest]
+        
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, err = await proc.communicate()
+        if proc.returncode:
+            raise RuntimeError(f"git clone failed: {err.decode(errors='replace').strip()}")
     
     def list_python_files(
         self,
@@ -159,30 +406,34 @@ class GitOperationsService:
         
         Args:
             repo_path: Path to cloned repo
-            exclude_patterns: Patterns to exclude
+            exclude_patterns: Directory names to exclude (hidden and
+                *.egg-info directories are always skipped)
             
         Returns:
             List of relative file paths
         """
-        exclude_patterns = exclude_patterns or [
-            '__pycache__', '.git', 'venv', '.venv',
-            'node_modules', '.egg-info', 'dist', 'build'
-        ]
-        
-        py_files = []
-        for root, dirs, files in os.walk(repo_path):
-            # Skip excluded directories
-            dirs[:] = [d for d in dirs if not any(
-                pattern in d for pattern in exclude_patterns
-            )]
-            
-            for file in files:
-                if file.endswith('.py'):
-                    full_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(full_path, repo_path)
-                    py_files.append(rel_path)
+        excluded = frozenset(exclude_patterns) if exclude_patterns else DEFAULT_EXCLUDED_DIRS
+        
+        # Repeat listings of an unchanged checkout skip the walk. A re-clone
+        # replaces the directory, which gives it a new mtime.
+        key = (repo_path, os.stat(repo_path).st_mtime_ns, excluded)
+        with self._list_cache_lock:
+            cached = self._list_cache.get(key)
+            if cached is not None:
+                self._list_cache.move_to_end(key)
+                return list(cached)
         
-        return sorted(py_files)
+        files = sorted(
+            os.path.relpath(path, repo_path)
+            for path in iter_python_files(repo_path, excluded)
+        )
+        
+        with self._list_cache_lock:
+            self._list_cache[key] = files
+            if len(self._list_cache) > LIST_CACHE_MAX:
+                self._list_cache.popitem(last=False)
+        
+        return list(files)
     
     def read_file(self, repo_path: str, file_path: str) -> str:
         """
@@ -195,19 +446,76 @@ class GitOperationsService:
         Returns:
             File content as string
         """
-        full_path = os.path.join(repo_path, file_path)
+        full_path = self._safe_join(repo_path, file_path)
+        return self._read_text(full_path)
+    
+    @staticmethod
+    def _read_text(full_path: str, max_size: Optional[int] = None) -> Optional[str]:
+        """
+        Read and decode a file with a single unbuffered read
         
-        # Security: prevent path traversal
-        if not os.path.abspath(full_path).startswith(os.path.abspath(repo_path)):
-            raise ValueError(f"Invalid path: {file_path}")
+        The raw FileIO read sizes its buffer from fstat, so the whole file
+        comes in one syscall; the size limit reuses that same fstat.
+        
+        Returns:
+            File content (utf-8, falling back to latin-1), or None if the
+            file is larger than max_size
+        """
+        with open(full_path, 'rb', buffering=0) as f:
+            if max_size is not None and os.fstat(f.fileno()).st_size > max_size:
+                return None
+            data = f.read()
+        
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            # Try with different encoding
+            text = data.decode('latin-1')
+        
+        # Match text-mode reads: universal newlines
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+    
+    async def read_file_async(self, repo_path: str, file_path: str) -> str:
+        """
+        Read file content without blocking the event loop
+        
+        Uses aiofiles when installed, otherwise reads in a worker thread.
+        
+        Args:
+            repo_path: Path to repo
+            file_path: Relative path to file
+            
+        Returns:
+            File content as string
+        """
+        if aiofiles is None:
+            return await asyncio.to_thread(self.read_file, repo_path, file_path)
+        
+        full_path = self._safe_join(repo_path, file_path)
         
         try:
-            with open(full_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            async with aiofiles.open(full_path, 'r', encoding='utf-8') as f:
+                return await f.read()
         except UnicodeDecodeError:
             # Try with different encoding
-            with open(full_path, 'r', encoding='latin-1') as f:
-                return f.read()
+            async with aiofiles.open(full_path, 'r', encoding='latin-1') as f:
+                return await f.read()
+    
+    def _safe_join(self, repo_path: str, file_path: str) -> str:
+        """Join file_path onto repo_path, rejecting paths that escape the repo"""
+        # Resolve each repo root once, not once per file
+        base = self._resolved_repos.get(repo_path)
+        if base is None:
+            base = self._resolved_repos[repo_path] = Path(repo_path).resolve()
+        
+        # Security: prevent path traversal (including symlinks out of the repo)
+        target = (base / file_path).resolve()
+        if not target.is_relative_to(base):
+            raise ValueError(f"Invalid path: {file_path}")
+        
+        return str(target)
     
     def read_multiple_files(
         self,
@@ -229,21 +537,61 @@ class GitOperationsService:
         result = {}
         
         for path in file_paths:
-            try:
-                full_path = os.path.join(repo_path, path)
-                
-                # Check file size
-                if os.path.getsize(full_path) > max_size:
-                    logger.warning(f"Skipping large file: {path}")
-                    continue
-                
-                result[path] = self.read_file(repo_path, path)
-            except Exception as e:
-                logger.warning(f"Failed to read {path}: {e}")
-                continue
+            content = self._read_file_limited(repo_path, path, max_size)
+            if content is not None:
+                result[path] = content
         
         return result
     
+    async def read_multiple_files_async(
+        self,
+        repo_path: str,
+        file_paths: List[str],
+        max_size: int = 100_000,
+        max_concurrent: int = 16
+    ) -> Dict[str, str]:
+        """
+        Read multiple files concurrently in worker threads
+        
+        Same result as read_multiple_files, but disk reads overlap and the
+        event loop stays free while they run.
+        
+        Args:
+            repo_path: Path to repo
+            file_paths: List of relative paths
+            max_size: Max file size in bytes
+            max_concurrent: Max files read at the same time
+            
+        Returns:
+            Dict mapping path to content (in file_paths order)
+        """
+        sem = asyncio.Semaphore(max_concurrent)
+        
+        async def read_one(path: str) -> Optional[str]:
+            async with sem:
+                return await asyncio.to_thread(
+                    self._read_file_limited, repo_path, path, max_size
+                )
+        
+        contents = await asyncio.gather(*(read_one(path) for path in file_paths))
+        
+        return {
+            path: content
+            for path, content in zip(file_paths, contents, strict=True)
+            if content is not None
+        }
+    
+    def _read_file_limited(self, repo_path: str, path: str, max_size: int) -> Optional[str]:
+        """Read one file, returning None if it is too large or unreadable"""
+        try:
+            content = self._read_text(self._safe_join(repo_path, path), max_size)
+            if content is None:
+                logger.warning(f"Skipping large file: {path}")
+            return content
+        except Exception as e:
+            logger.warning(f"Failed to read {path}: {e}")
+            return None
+    
     def get_repo_structure(self, repo_path: str) -> Dict:
         """
         Get repository structure as tree
@@ -253,23 +601,43 @@ class GitOperationsService:
         """
         structure = {}
         
-        for root, dirs, files in os.walk(repo_path):
-            # Skip hidden and system dirs
-            dirs[:] = [d for d in dirs if not d.startswith('.')]
-            
-            rel_root = os.path.relpath(root, repo_path)
-            if rel_root == '.':
-                rel_root = ''
+        # Same top-down order as os.walk, but scandir entries carry their
+        # type, and relative paths are built up instead of relpath'd
+        stack = [(repo_path, '')]
+        while stack:
+            current, rel_root = stack.pop()
+            dirs, files, descend = [], [], []
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if not is_dir:
+                            files.append(entry.name)
+                        elif not entry.name.startswith('.'):  # Skip hidden and system dirs
+                            dirs.append(entry.name)
+                            if not entry.is_symlink():
+                                descend.append(entry)
+            except OSError:
+                continue
             
             structure[rel_root] = {
                 'dirs': sorted(dirs),
                 'files': sorted(files)
             }
+            stack.extend(
+                (entry.path, os.path.join(rel_root, entry.name) if rel_root else entry.name)
+                for entry in reversed(descend)
+            )
         
         return structure
     
-    def _extract_repo_info(self, repo_url: str) -> tuple:
-        """Extract owner/repo from URL"""
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _extract_repo_info(repo_url: str) -> tuple:
+        """Extract owner/repo from URL (memoized - same URLs are resubmitted)"""
         parts = repo_url.rstrip('/').split('/')
         repo_name = parts[-1].replace('.git', '')
         owner = parts[-2]
@@ -7,11 +7,63 @@ try:
     import httpx
 except ImportError:
     httpx = None
+try:
+    import h2  # Enables HTTP/2 in httpx
+except ImportError:
+    h2 = None
 from typing import List, Dict, Optional
+import asyncio
+import functools
+import logging
 import os
-from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from types import MappingProxyType
+from datetime import datetime, timezone
 import re
 
+logger = logging.getLogger(__name__)
+
+# Headers for unauthenticated requests - built once, shared read-only
+_PUBLIC_HEADERS = MappingProxyType({
+    "Accept": "application/vnd.github.v3+json",
+    "User-Agent": "RepoIntegrator/1.0"
+})
+
+_REPO_URL_RE = re.compile(r'github\.com/([^/]+)/([^/]+)')
+_VALID_URL_RE = re.compile(r'(https?://)?(www\.)?github\.com/[\w-]+/[\w.-]+')
+
+API_TIMEOUT = 10.0  # Default per-request timeout, in seconds
+ETAG_CACHE_SIZE = 256  # Validated repos whose ETag is kept
+
+# _format_date thresholds, in seconds
+_HOUR = 3600.0
+_DAY = 24 * _HOUR
+_WEEK = 7 * _DAY
+_MONTH = 30 * _DAY
+
+
+# URL checks are pure string work; memoize them since the UI and API
+# validate, then parse, the same handful of URLs over and over
+
+@functools.lru_cache(maxsize=1024)
+def _parse_repo_url(url: str) -> tuple[str, str]:
+    url = url.rstrip('/').replace('.git', '')
+    match = _REPO_URL_RE.search(url)
+    
+    if match:
+        return match.group(1), match.group(2)
+    
+    parts = url.split('/')
+    if len(parts) >= 2:
+        return parts[-2], parts[-1]
+    
+    raise ValueError(f"Invalid GitHub URL: {url}")
+
+
+@functools.lru_cache(maxsize=1024)
+def _is_valid_github_url(url: str) -> bool:
+    return bool(_VALID_URL_RE.match(url))
+
 
 class GitHubAPIService:
     """
@@ -27,13 +79,61 @@ class GitHubAPIService:
         self.token = token or os.getenv("GITHUB_TOKEN")
         self.base_url = "https://api.github.com"
         
-        self.headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "User-Agent": "RepoIntegrator/1.0"
-        }
+        self.headers = dict(_PUBLIC_HEADERS)
         
         if self.token:
             self.headers["Authorization"] = f"Bearer {self.token}"
+        
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # ETag of each validated repo, for conditional (304) re-validation (LRU)
+        self._etags: "OrderedDict[tuple, str]" = OrderedDict()
+    
+    def _get_client(self) -> "httpx.AsyncClient":
+        """
+        Shared client, so calls reuse keep-alive (and HTTP/2 if h2 is
+        installed) connections to api.github.com instead of a new TLS
+        handshake each time. A client is bound to its event loop, so a new
+        one is made if the service is used from another loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._discard_client()
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=h2 is not None,
+                follow_redirects=True,
+                timeout=API_TIMEOUT,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=40)
+            )
+            self._client_loop = loop
+        return self._client
+    
+    def _discard_client(self) -> None:
+        """
+        Drop a client bound to another event loop. It can only be closed on
+        its own loop, so the close is scheduled there if that loop is still
+        running; a stopped loop's connections can't be used by anyone anymore.
+        """
+        client, loop = self._client, self._client_loop
+        self._client = None
+        self._client_loop = None
+        if client is None or client.is_closed:
+            return
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            logger.debug("Dropping HTTP client of a stopped event loop")
+    
+    async def close(self):
+        """Close the shared HTTP client"""
+        if self._client is not None and self._client_loop is asyncio.get_running_loop():
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+        else:
+            self._discard_client()
     
     async def search_repositories(
         self, 
@@ -52,122 +152,144 @@ class GitHubAPIService:
         if language:
             search_query += f" language:{language}"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/search/repositories",
-                    params={
-                        "q": search_query,
-                        "sort": "stars",
-                        "order": "desc",
-                        "per_page": limit
-                    },
-                    headers=self.headers,
-                    timeout=10.0,
-                    follow_redirects=True
-                )
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                return [
-                    {
-                        "full_name": repo["full_name"],
-                        "owner": repo["owner"]["login"],
-                        "name": repo["name"],
-                        "description": repo["description"] or "No description",
-                        "stars": repo["stargazers_count"],
-                        "language": repo["language"] or "Unknown",
-                        "updated": self._format_date(repo["updated_at"]),
-                        "html_url": repo["html_url"],
-                        "clone_url": repo["clone_url"],
-                        "default_branch": repo["default_branch"],
-                        "size": repo["size"],
-                    }
-                    for repo in data.get("items", [])[:limit]
-                ]
-                
-            except Exception as e:
-                print(f"GitHub API error: {e}")
-                return []
+        try:
+            response = await self._get_client().get(
+                "/search/repositories",
+                params={
+                    "q": search_query,
+                    "sort": "stars",
+                    "order": "desc",
+                    "per_page": limit
+                },
+                headers=self.headers
+            )
+            
+            response.raise_for_status()
+            data = response.json()
+            now = datetime.now(timezone.utc)
+            
+            return [
+                {
+                    "full_name": repo["full_name"],
+                    "owner": repo["owner"]["login"],
+                    "name": repo["name"],
+                    "description": repo["description"] or "No description",
+                    "stars": repo["stargazers_count"],
+                    "language": repo["language"] or "Unknown",
+                    "updated": self._format_date(repo["updated_at"], now),
+                    "html_url": repo["html_url"],
+                    "clone_url": repo["clone_url"],
+                    "default_branch": repo["default_branch"],
+                    "size": repo["size"],
+                }
+                for repo in data.get("items", [])[:limit]
+            ]
+            
+        except Exception as e:
+            print(f"GitHub API error: {e}")
+            return []
+    
+    async def enrich_search_results(
+        self,
+        query: str,
+        limit: int = 5,
+        language: Optional[str] = None,
+        max_concurrent: int = 10
+    ) -> List[Dict]:
+        """
+        Search, then add the fields of each hit's full repository info
+        that search results lack (e.g. topics)
+        
+        The per-repo lookups are independent, so they run concurrently,
+        at most max_concurrent at a time (GitHub secondary rate limits).
+        Hits whose lookup fails are returned as the search gave them.
+        """
+        results = await self.search_repositories(query, limit, language)
+        sem = asyncio.Semaphore(max_concurrent)
+        
+        async def info_for(repo: Dict) -> Optional[Dict]:
+            async with sem:
+                return await self.get_repository_info(repo["owner"], repo["name"])
+        
+        infos = await asyncio.gather(*(info_for(repo) for repo in results))
+        for repo, info in zip(results, infos, strict=True):
+            if info:
+                # Only add what the hit lacks: its None description/language
+                # must not replace the "No description"/"Unknown" defaults
+                for key, value in info.items():
+                    repo.setdefault(key, value)
+        return results
     
     async def validate_repository(self, owner: str, repo: str) -> bool:
-        """Check if repository exists and is accessible"""
-        async with httpx.AsyncClient() as client:
-            try:
-                url = f"{self.base_url}/repos/{owner}/{repo}"
-                
-                # Try with token first if available
-                if self.token:
-                    response = await client.get(
-                        url,
-                        headers=self.headers,
-                        timeout=5.0,
-                        follow_redirects=True
-                    )
-                    if response.status_code == 200:
-                        return True
-                
-                # Try without token for public repos
-                headers_no_auth = {
-                    "Accept": "application/vnd.github.v3+json",
-                    "User-Agent": "RepoIntegrator/1.0"
-                }
-                
-                response = await client.get(
-                    url,
-                    headers=headers_no_auth,
-                    timeout=5.0,
-                    follow_redirects=True
-                )
-                
-                return response.status_code == 200
-                
-            except Exception as e:
-                print(f"validate_repository exception: {e}")
-                return False
+        """
+        Check if repository exists and is accessible
+        
+        Sends a HEAD request (no body) and, for repos validated before, the
+        stored ETag - an unchanged repo then answers 304 Not Modified.
+        """
+        key = (owner, repo)
+        headers = self.headers
+        etag = self._etags.get(key)
+        if etag:
+            self._etags.move_to_end(key)
+            headers = {**self.headers, "If-None-Match": etag}
+        
+        try:
+            response = await self._get_client().head(
+                f"/repos/{owner}/{repo}", headers=headers, timeout=5.0
+            )
+        except Exception as e:
+            print(f"validate_repository exception: {e}")
+            return False
+        
+        if response.status_code == 304:
+            return True
+        if response.status_code == 200:
+            etag = response.headers.get("etag")
+            if etag:
+                self._etags[key] = etag
+                self._etags.move_to_end(key)
+                if len(self._etags) > ETAG_CACHE_SIZE:
+                    self._etags.popitem(last=False)
+            return True
+        
+        self._etags.pop(key, None)
+        return False
     
     async def get_repository_info(self, owner: str, repo: str) -> Optional[Dict]:
         """Get detailed repository information"""
-        async with httpx.AsyncClient() as client:
-            try:
-                url = f"{self.base_url}/repos/{owner}/{repo}"
-                
-                # Try with token first if available
-                if self.token:
-                    try:
-                        response = await client.get(
-                            url,
-                            headers=self.headers,
-                            timeout=10.0,
-                            follow_redirects=True
-                        )
-                        if response.status_code == 200:
-                            repo_data = response.json()
-                            return self._format_repo_data(repo_data)
-                    except:
-                        pass
-                
-                # Try without token for public repos
-                headers_no_auth = {
-                    "Accept": "application/vnd.github.v3+json",
-                    "User-Agent": "RepoIntegrator/1.0"
-                }
-                
-                response = await client.get(
-                    url,
-                    headers=headers_no_auth,
-                    timeout=10.0,
-                    follow_redirects=True
-                )
-                response.raise_for_status()
-                
-                repo_data = response.json()
-                return self._format_repo_data(repo_data)
-                
-            except Exception as e:
-                print(f"get_repository_info exception: {e}")
-                return None
+        try:
+            response = await self._get_client().get(
+                f"/repos/{owner}/{repo}", headers=self.headers
+            )
+            response.raise_for_status()
+            
+            repo_data = response.json()
+            return self._format_repo_data(repo_data)
+            
+        except Exception as e:
+            print(f"get_repository_info exception: {e}")
+            return None
+    
+    async def get_head_sha(self, owner: str, repo: str) -> Optional[str]:
+        """
+        Current commit SHA of the repo's default branch, or None
+        
+        The vnd.github.sha media type returns just the SHA as plain text,
+        so this costs one small request.
+        """
+        headers = {**self.headers, "Accept": "application/vnd.github.sha"}
+        try:
+            response = await self._get_client().get(
+                f"/repos/{owner}/{repo}/commits/HEAD", headers=headers, timeout=5.0
+            )
+        except Exception as e:
+            logger.warning(f"get_head_sha failed: {e}")
+            return None
+        
+        if response.status_code != 200:
+            return None
+        return response.text.strip() or None
     
     def _format_repo_data(self, repo_data: Dict) -> Dict:
         """Format repository data from GitHub API"""
@@ -183,44 +305,36 @@ class GitHubAPIService:
     
     def parse_repo_url(self, url: str) -> tuple[str, str]:
         """Parse owner and repo name from GitHub URL"""
-        url = url.rstrip('/').replace('.git', '')
-        pattern = r'github\.com/([^/]+)/([^/]+)'
-        match = re.search(pattern, url)
-        
-        if match:
-            return match.group(1), match.group(2)
-        
-        parts = url.split('/')
-        if len(parts) >= 2:
-            return parts[-2], parts[-1]
-        
-        raise ValueError(f"Invalid GitHub URL: {url}")
+        return _parse_repo_url(url)
     
     def is_valid_github_url(self, url: str) -> bool:
         """Validate if string is a valid GitHub repository URL"""
-        pattern = r'(https?://)?(www\.)?github\.com/[\w-]+/[\w.-]+'
-        return bool(re.match(pattern, url))
+        return _is_valid_github_url(url)
     
-    def _format_date(self, date_str: str) -> str:
-        """Format ISO date to human readable"""
+    def _format_date(self, date_str: str, now: Optional[datetime] = None) -> str:
+        """
+        Format ISO date to human readable
+        
+        Args:
+            date_str: ISO 8601 timestamp from the GitHub API
+            now: Reference time; pass one value when formatting a batch
+        """
         try:
             date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            now = datetime.now(timezone.utc)
-            delta = now - date
+            if now is None:
+                now = datetime.now(timezone.utc)
+            seconds = (now - date).total_seconds()
             
-            if delta < timedelta(hours=1):
-                minutes = int(delta.total_seconds() / 60)
+            if seconds < _HOUR:
+                minutes = int(seconds / 60)
                 return f"{minutes}m ago" if minutes > 0 else "just now"
-            elif delta < timedelta(days=1):
-                hours = int(delta.total_seconds() / 3600)
-                return f"{hours}h ago"
-            elif delta < timedelta(days=7):
-                return f"{delta.days}d ago"
-            elif delta < timedelta(days=30):
-                weeks = delta.days // 7
-                return f"{weeks}w ago"
+            elif seconds < _DAY:
+                return f"{int(seconds / _HOUR)}h ago"
+            elif seconds < _WEEK:
+                return f"{int(seconds // _DAY)}d ago"
+            elif seconds < _MONTH:
+                return f"{int(seconds // _WEEK)}w ago"
             else:
-                months = delta.days // 30
-                return f"{months}mo ago"
+                return f"{int(seconds // _MONTH)}mo ago"
         except:
             return "recently"
\ No newline at end of file
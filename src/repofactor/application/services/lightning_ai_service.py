@@ -12,11 +12,14 @@ try:
 except ImportError:
     pass
 
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, Callable, Optional, Dict, Any, Union
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
+import functools
+import hashlib
 import logging
+import threading
 
 try:
     from tenacity import retry, stop_after_attempt, wait_exponential
@@ -35,10 +38,59 @@ try:
     from litai import LLM
 except ImportError:
     LLM = None
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def _shared_llm(model: str, api_key: str) -> "LLM":
+    """
+    One LitAI LLM per model and API key, shared by every client in the process.
+    
+    Creating an LLM resolves the model on a background thread and opens new
+    HTTP connections; sharing it keeps those warm across agents and calls.
+    LitAI reads its credentials from the environment when the LLM is built,
+    so the key is set right before; clients with another key get their own.
+    """
+    os.environ["LIGHTNING_API_KEY"] = api_key
+    return LLM(model=model)
+
+
+# LLM replies persist here across runs (needs the optional diskcache)
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "./cache/llm")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 86400))
+# Bump to drop every stored reply, e.g. after a prompt format change
+LLM_CACHE_VERSION = 1
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_reply_cache(directory: str) -> "diskcache.Cache":
+    """One on-disk reply cache per directory, shared by every client"""
+    return diskcache.Cache(directory)
+
+
+def _reply_cache_key(
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str],
+    max_tokens: int,
+    temperature: float
+) -> str:
+    """Digest of everything that determines an LLM reply"""
+    h = hashlib.blake2b(digest_size=16)
+    parts = (str(LLM_CACHE_VERSION), model, str(max_tokens), repr(temperature),
+             system_prompt or "", prompt)
+    for part in parts:
+        data = part.encode("utf-8", "surrogatepass")
+        h.update(len(data).to_bytes(8, "little"))  # Length prefix keeps parts unambiguous
+        h.update(data)
+    return h.hexdigest()
+
+
 class LightningModel(Enum):
     """Available models on Lightning AI"""
     GEMINI_2_5_FLASH = "google/gemini-2.5-flash-lite-preview-06-17"
@@ -52,6 +104,7 @@ class LightningResponse:
     usage: Optional[Dict[str, int]] = None
     finish_reason: str = "stop"
     metadata: Optional[Dict] = None
+    cache_key: Optional[str] = None  # Reply cache entry, for forget_reply
 
 
 class LightningAIClient:
@@ -76,24 +129,62 @@ class LightningAIClient:
         # Default model
         self.model_name = model or os.getenv("LLM_MODEL", "google/gemini-2.5-flash-lite-preview-06-17")
         
-        # Initialize LLM with LitAI SDK
-        self.llm = LLM(model=self.model_name)
+        # Shared LitAI SDK instance (reuses model setup and connections)
+        self.llm = _shared_llm(self.model_name, self.api_key)
         
         # Rate limiting (20 calls per month for free tier)
         self.monthly_quota = 20
         self.calls_made = 0
+        
+        self._reply_cache = None
+    
+    @property
+    def reply_cache(self):
+        """Lazily opened on-disk cache of LLM replies, or None without diskcache"""
+        if self._reply_cache is None and diskcache is not None:
+            self._reply_cache = _shared_reply_cache(LLM_CACHE_DIR)
+        return self._reply_cache
+    
+    def _remember_reply(self, key: str, response: LightningResponse) -> None:
+        """Store a successful reply for identical future requests"""
+        if self.reply_cache is not None:
+            self.reply_cache.set(key, response.text, expire=LLM_CACHE_TTL)
+            response.cache_key = key
+    
+    def forget_reply(self, response: LightningResponse) -> None:
+        """
+        Drop a reply the caller could not use from the reply cache.
+        
+        generate() caches every non-empty reply; a caller that then fails to
+        parse it calls this so the next identical request asks the LLM again
+        instead of replaying the bad reply for LLM_CACHE_TTL. Cache errors
+        are logged, not raised: callers fall back to a fresh request anyway.
+        """
+        if response.cache_key and self.reply_cache is not None:
+            try:
+                self.reply_cache.delete(response.cache_key)
+            except Exception as e:
+                logger.warning(f"Could not drop cached LLM reply: {e}")
+                return
+            response.cache_key = None
     
     async def _call_llm(
-        self, prompt: str, model: str, max_tokens: int, temperature: float
+        self,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str] = None
     ) -> LightningResponse:
         """Helper to call the LLM and handle response."""
 
-        loop = asyncio.get_event_loop()
         logger.info("🔄 Calling Lightning AI...")
         logger.info(f"   Prompt: {len(prompt)} chars (~{len(prompt)//4} tokens)")
         logger.info(f"   Model: {model}")
 
-        response_text = await loop.run_in_executor(None, self.llm.chat, prompt)
+        response_text = await asyncio.to_thread(
+            self.llm.chat, prompt, system_prompt=system_prompt
+        )
 
         logger.info("✅ Response received")
         logger.debug(f"   Type: {type(response_text)}")
@@ -136,24 +227,45 @@ class LightningAIClient:
         max_tokens: int = 2000,
         temperature: float = 0.1,
         stream: bool = False,
-        prompt_fallback: Optional[str] = None
+        prompt_fallback: Optional[Union[str, Callable[[], str]]] = None,
+        system_prompt: Optional[str] = None
     ) -> LightningResponse:
         """
         Generate completion with fallback for empty responses.
+        
+        system_prompt is sent separately from prompt (and prompt_fallback),
+        so a stable instruction prefix can be reused across calls.
+        prompt_fallback may be a callable; it is only invoked (in a worker
+        thread) when the first attempt fails.
+        Replies are cached on disk (with diskcache) by model, prompts and
+        sampling parameters; a cache hit costs no quota. Callers that cannot
+        use a reply should pass it to forget_reply.
         """
+        use_model = model or self.model_name
+        cache_key = _reply_cache_key(use_model, prompt, system_prompt, max_tokens, temperature)
+        if self.reply_cache is not None:
+            cached = self.reply_cache.get(cache_key)
+            if cached is not None:
+                logger.info("♻️ Using cached LLM reply (no quota used)")
+                return LightningResponse(
+                    text=cached, model=use_model, metadata={"cached": True}, cache_key=cache_key
+                )
+
         if self.calls_made >= self.monthly_quota:
             raise RuntimeError(f"Monthly quota exceeded ({self.monthly_quota} calls).")
 
-        use_model = model or self.model_name
         if use_model != self.llm.model:
             logger.info(f"🔄 Switching model to: {use_model}")
-            self.llm = LLM(model=use_model)
+            self.llm = _shared_llm(use_model, self.api_key)
 
         try:
             # Initial attempt
-            response = await self._call_llm(prompt, use_model, max_tokens, temperature)
+            response = await self._call_llm(
+                prompt, use_model, max_tokens, temperature, system_prompt
+            )
             self.calls_made += 1
             logger.info(f"📊 Quota: {self.calls_made}/{self.monthly_quota} calls used")
+            self._remember_reply(cache_key, response)
             return response
 
         except Exception as e:
@@ -167,11 +279,17 @@ class LightningAIClient:
                     raise RuntimeError(f"Monthly quota exceeded before fallback.")
 
                 try:
+                    if callable(prompt_fallback):
+                        prompt_fallback = await asyncio.to_thread(prompt_fallback)
                     # Fallback attempt
-                    response = await self._call_llm(prompt_fallback, use_model, max_tokens, temperature)
+                    response = await self._call_llm(
+                        prompt_fallback, use_model, max_tokens, temperature, system_prompt
+                    )
                     self.calls_made += 1
                     logger.info(f"✅ Fallback call successful!")
                     logger.info(f"📊 Quota: {self.calls_made}/{self.monthly_quota} calls used")
+                    # The fallback answers the same request, so it is cached under it
+                    self._remember_reply(cache_key, response)
                     return response
                 except Exception as fallback_e:
                     logger.error(f"❌ Fallback call also failed: {fallback_e}", exc_info=True)
@@ -185,30 +303,73 @@ class LightningAIClient:
         prompt: str,
         model: Optional[str] = None,
         max_tokens: int = 2000,
-        temperature: float = 0.1
-    ):
+        temperature: float = 0.1,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
         """
-        Stream response from Lightning AI.
+        Stream response chunks from Lightning AI as they are generated.
         
-        Note: Streaming not yet supported by LitAI SDK.
-        Falls back to regular generation and yields the whole response.
+        The blocking LitAI stream is drained on a worker thread and handed
+        over through a queue, so callers can parse while tokens arrive.
         """
-        
-        response = await self.generate(
-            prompt=prompt,
-            model=model,
-            max_tokens=max_tokens,
-            temperature=temperature
-        )
-        
-        # Simulate streaming by yielding chunks
-        words = response.text.split()
-        chunk_size = 5
-        
-        for i in range(0, len(words), chunk_size):
-            chunk = ' '.join(words[i:i + chunk_size]) + ' '
-            yield chunk
-            await asyncio.sleep(0.1)  # Small delay to simulate streaming
+        if self.calls_made >= self.monthly_quota:
+            raise RuntimeError(f"Monthly quota exceeded ({self.monthly_quota} calls).")
+
+        use_model = model or self.model_name
+        if use_model != self.llm.model:
+            logger.info(f"🔄 Switching model to: {use_model}")
+            self.llm = _shared_llm(use_model, self.api_key)
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        stop = threading.Event()  # Set when the consumer stops early
+
+        def emit(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                pass  # Loop already closed; nobody is listening
+
+        def pump():
+            stream = None
+            try:
+                stream = self.llm.chat(prompt, system_prompt=system_prompt, stream=True)
+                for chunk in stream:
+                    if stop.is_set():
+                        break
+                    if chunk:
+                        emit(str(chunk))
+            except Exception as e:
+                emit(e)
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    try:
+                        close()  # Release the connection of an abandoned stream
+                    except Exception:
+                        pass
+                emit(done)
+
+        logger.info(f"🔄 Streaming from Lightning AI ({len(prompt)} chars, model {use_model})")
+        # A plain daemon thread rather than to_thread: when the consumer stops
+        # early, the blocking stream only notices on its next chunk, and
+        # neither the consumer nor loop shutdown should wait for that
+        threading.Thread(target=pump, name="litai-stream", daemon=True).start()
+        counted = False
+        try:
+            while (item := await queue.get()) is not done:
+                if isinstance(item, Exception):
+                    raise item
+                if not counted:
+                    # Only a stream that produced output uses up a call
+                    counted = True
+                    self.calls_made += 1
+                yield item
+        finally:
+            stop.set()
+        if counted:
+            logger.info(f"📊 Quota: {self.calls_made}/{self.monthly_quota} calls used")
     
     def get_remaining_quota(self) -> int:
         """Get remaining API calls for the month"""
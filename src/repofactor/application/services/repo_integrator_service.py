@@ -4,16 +4,24 @@ Orchestrator for repository analysis.
 This is the 'conductor' that manages the entire flow
 """
 
+import asyncio
+import heapq
 import logging
 from typing import Dict, List, Optional, Any
 import os
 import sys
 from typing import Union
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+_SRC_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+if _SRC_ROOT not in sys.path:  # idempotent across reloads
+    sys.path.insert(0, _SRC_ROOT)
 try:
     from dotenv import load_dotenv; load_dotenv()
 except ImportError:
     pass
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
 
 print(f"LIGHTNING_API_KEY: {os.getenv('LIGHTNING_API_KEY')}")
 
@@ -38,6 +46,30 @@ from repofactor.application.services.repo_service import RepoService
 
 logger = logging.getLogger(__name__)
 
+# Finished analyses persist here across restarts (needs the optional diskcache)
+ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", "./cache/analysis")
+
+# Path fragments that mark likely entry points, most important first
+_PRIORITY_PATTERNS = ('main.py', 'app.py', 'core/', 'src/')
+_OTHER_RANK = len(_PRIORITY_PATTERNS) + 1
+
+
+def _same_commit(local_sha: Optional[str], remote_sha: str) -> bool:
+    """Archive checkouts only know an abbreviated SHA, so compare by prefix"""
+    return bool(local_sha) and remote_sha.startswith(local_sha)
+
+
+def _file_rank(file: str, target_file: Optional[str]) -> Optional[int]:
+    """Selection rank for a file (lower is better), or None to skip it"""
+    if file == target_file:
+        return 0
+    for rank, pattern in enumerate(_PRIORITY_PATTERNS, start=1):
+        if pattern in file:
+            return rank
+    if 'test' in file.lower():
+        return None
+    return _OTHER_RANK
+
 
 class RepoIntegratorService:
     """
@@ -75,8 +107,16 @@ class RepoIntegratorService:
         else:
             self.model = model
         
-        self.agent_core = AgentCore(".")
+        # Built on first analysis, then re-pointed at each new repo
+        self.agent_core: Optional[AgentCore] = None
+        self._result_cache = None
 
+    @property
+    def result_cache(self):
+        """Lazily opened on-disk cache of AnalysisResults, or None without diskcache"""
+        if self._result_cache is None and diskcache is not None:
+            self._result_cache = diskcache.Cache(ANALYSIS_CACHE_DIR)
+        return self._result_cache
     
     async def analyze_repository(
         self,
@@ -98,19 +138,58 @@ class RepoIntegratorService:
                 raise ValueError(f"Invalid GitHub URL: {repo_url}")
             
             # Step 2: Clone repository
+            # With a result cache, resolve the upstream commit first: a hit on
+            # it needs no clone at all, and a cached checkout never expires
+            # unless REPO_CACHE_TTL is set, so its SHA alone would keep
+            # serving results for an outdated tree
+            remote_sha = None
+            if use_cache and self.result_cache is not None:
+                remote_sha = await self._remote_head_sha(repo_url)
+                if remote_sha:
+                    cached = self.result_cache.get(self._analysis_cache_key(
+                        repo_url, remote_sha, target_file, user_instructions, max_files
+                    ))
+                    if cached is not None:
+                        logger.info(f"Using cached analysis for {remote_sha}")
+                        return cached
+            
             logger.info("Cloning repository...")
             repo_metadata = await self.repo_service.git.clone_repository(
                 repo_url,
                 use_cache=use_cache
             )
+            if remote_sha and not _same_commit(repo_metadata.head_sha, remote_sha):
+                logger.info("Cached checkout is behind upstream, fetching again")
+                repo_metadata = await self.repo_service.git.clone_repository(
+                    repo_url,
+                    use_cache=False
+                )
             logger.info(f"Cloned to: {repo_metadata.local_path}")
             
+            # Cached results are keyed on the upstream commit, so pushes invalidate them
+            head_sha = remote_sha or repo_metadata.head_sha
+            cache_key = None
+            if use_cache and head_sha and self.result_cache is not None:
+                cache_key = self._analysis_cache_key(
+                    repo_url, head_sha, target_file, user_instructions, max_files
+                )
+                # Without a remote SHA the lookup could only happen after cloning
+                if not remote_sha:
+                    cached = self.result_cache.get(cache_key)
+                    if cached is not None:
+                        logger.info(f"Using cached analysis for {head_sha}")
+                        return cached
+            
             # Step 3: Update AgentCore with repo path (אם זה דרוש)
-            self.agent_core = AgentCore(repo_metadata.local_path)
+            if self.agent_core is None:
+                self.agent_core = AgentCore(repo_metadata.local_path)
+            else:
+                self.agent_core.set_repo_path(repo_metadata.local_path)
             
             # Step 4: List Python files
             logger.info("Listing Python files...")
-            py_files = self.repo_service.git.list_python_files(
+            py_files = await asyncio.to_thread(
+                self.repo_service.git.list_python_files,
                 repo_metadata.local_path
             )
             logger.info(f"Found {len(py_files)} Python files")
@@ -137,14 +216,15 @@ class RepoIntegratorService:
             
             # Step 6: Read file contents
             logger.info("Reading file contents...")
-            file_contents = self.repo_service.git.read_multiple_files(
+            file_contents = await self.repo_service.git.read_multiple_files_async(
                 repo_metadata.local_path,
                 relevant_files
             )
             logger.info(f"Read {len(file_contents)} files successfully")
             
-            # Step 7: Use MultiAgentOrchestrator instead of a single agent
-            orchestrator = MultiAgentOrchestrator()
+            # Step 7: Use MultiAgentOrchestrator instead of a single agent.
+            # Each run gets fresh flow state and LLM clients (with their quota).
+            orchestrator = self.orchestrator.new_run()
             
             results = await orchestrator.run_full_flow(
                 repo_content_old=file_contents,
@@ -162,6 +242,9 @@ class RepoIntegratorService:
             analysis_result.implementation_result = results.get("implementation")
             analysis_result.diff = results.get("diff")
 
+            if cache_key is not None:
+                self.result_cache.set(cache_key, analysis_result)
+
             return analysis_result
         
         except ValueError as e:
@@ -172,6 +255,27 @@ class RepoIntegratorService:
             logger.error(f"Analysis failed: {e}", exc_info=True)
             raise RuntimeError(f"Repository analysis failed: {str(e)}")
     
+    def _analysis_cache_key(
+        self,
+        repo_url: str,
+        head_sha: str,
+        target_file: Optional[str],
+        user_instructions: str,
+        max_files: int
+    ) -> tuple:
+        """result_cache key for one analysis of repo_url at head_sha"""
+        return (repo_url, head_sha, target_file, user_instructions, self.model, max_files)
+    
+    async def _remote_head_sha(self, repo_url: str) -> Optional[str]:
+        """Upstream HEAD commit: GitHub API first, `git ls-remote` as fallback"""
+        try:
+            owner, repo = self.repo_service.api.parse_repo_url(repo_url)
+            sha = await self.repo_service.api.get_head_sha(owner, repo)
+        except Exception as e:
+            logger.debug(f"GitHub HEAD lookup failed: {e}")
+            sha = None
+        return sha or await self.repo_service.git.resolve_head_sha(repo_url)
+    
     def _select_relevant_files(
         self,
         all_files: List[str],
@@ -187,29 +291,14 @@ class RepoIntegratorService:
         3. Avoid test files (for now)
         4. Limit to max_files
         """
-        selected = []
-        
-        # Priority 1: Target file
-        if target_file and target_file in all_files:
-            selected.append(target_file)
-        
-        # Priority 2: Main/core files
-        priority_patterns = ['main.py', 'app.py', 'core/', 'src/']
-        for pattern in priority_patterns:
-            for file in all_files:
-                if pattern in file and file not in selected:
-                    selected.append(file)
-                    if len(selected) >= max_files:
-                        return selected
-        
-        # Priority 3: Other files (excluding tests)
-        for file in all_files:
-            if 'test' not in file.lower() and file not in selected:
-                selected.append(file)
-                if len(selected) >= max_files:
-                    return selected
-        
-        return selected[:max_files]
+        # One pass ranks every file by (priority, listing order); only the
+        # best max_files are kept, rather than re-scanning per pattern
+        ranked = (
+            (rank, index, file)
+            for index, file in enumerate(all_files)
+            if (rank := _file_rank(file, target_file)) is not None
+        )
+        return [file for _, _, file in heapq.nsmallest(max_files, ranked)]
     
     async def validate_repository(self, repo_url: str) -> bool:
         """
@@ -247,7 +336,10 @@ class RepoIntegratorService:
     
     async def close(self):
         """Cleanup resources"""
-        pass
+        if self._result_cache is not None:
+            self._result_cache.close()
+            self._result_cache = None
+        await self.repo_service.close()
 
 
 # ============================================================================
@@ -320,8 +412,6 @@ async def quick_validate_test():
 
 
 if __name__ == "__main__":
-    import asyncio
-    
     # Run tests
     print("Running integration test...\n")
     asyncio.run(test_integration())
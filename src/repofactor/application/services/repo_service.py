@@ -4,6 +4,8 @@ Combined service that uses both API and Git operations
 This is what you import in your UI/API
 """
 
+import asyncio
+
 from .github_api_service import GitHubAPIService
 from .git_operations_service import GitOperationsService, RepoMetadata
 from typing import Dict, Optional, List
@@ -20,6 +22,10 @@ class RepoService:
         self.api = GitHubAPIService()
         self.git = GitOperationsService()
     
+    async def close(self):
+        """Release the GitHub API client's connections"""
+        await self.api.close()
+    
     async def search_and_validate(
         self,
         query: str,
@@ -64,11 +70,11 @@ class RepoService:
         # Parse URL
         owner, name = self.api.parse_repo_url(repo_url)
         
-        # Get info from API
-        info = await self.api.get_repository_info(owner, name)
-        
-        # Clone repo
-        metadata = await self.git.clone_repository(repo_url, use_cache)
+        # API lookup and clone are independent - run them together
+        info, metadata = await asyncio.gather(
+            self.api.get_repository_info(owner, name),
+            self.git.clone_repository(repo_url, use_cache)
+        )
         
         return info, metadata
     
@@ -86,18 +92,28 @@ class RepoService:
         metadata = await self.git.clone_repository(repo_url)
         
         try:
-            # List Python files
-            py_files = self.git.list_python_files(metadata.local_path)
-            
-            # Read up to max_files
-            files_to_read = py_files[:max_files]
-            file_contents = self.git.read_multiple_files(
-                metadata.local_path,
-                files_to_read
+            # Walk the tree in a thread while files are listed and read
+            structure_task = asyncio.create_task(
+                asyncio.to_thread(self.git.get_repo_structure, metadata.local_path)
             )
             
-            # Get structure
-            structure = self.git.get_repo_structure(metadata.local_path)
+            try:
+                # List Python files
+                py_files = await asyncio.to_thread(
+                    self.git.list_python_files, metadata.local_path
+                )
+                
+                # Read up to max_files
+                files_to_read = py_files[:max_files]
+                file_contents = await self.git.read_multiple_files_async(
+                    metadata.local_path,
+                    files_to_read
+                )
+            except Exception:
+                structure_task.cancel()
+                raise
+            
+            structure = await structure_task
             
             return {
                 "success": True,
@@ -15,14 +15,14 @@ class ChangeType(Enum):
     CREATE = "create"
     DELETE = "delete"
 
-@dataclass
+@dataclass(slots=True)
 class OrchestratorState:
     approval_received: bool = False
     current_stage: str = "init"
     retry_count: int = 0
     last_error_message: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class Solution:
     source: str
     url: str
@@ -32,7 +32,7 @@ class Solution:
     confidence: float
     search_query: str
 
-@dataclass
+@dataclass(slots=True)
 class ResearchResult:
     solutions_found: List[Solution]
     recommendations: List[str]
@@ -40,7 +40,7 @@ class ResearchResult:
     total_sources: int
 
 
-@dataclass
+@dataclass(slots=True)
 class AffectedFile:
     """Detailed file information"""
     path: str
@@ -57,7 +57,7 @@ class AffectedFile:
         return data
 
 
-@dataclass
+@dataclass(slots=True)
 class AnalysisResult:
     """Complete analysis result - works for both simple and multi-agent"""
     
@@ -245,7 +245,7 @@ def create_empty_analysis(repo_url: str, repo_name: str, reason: str = "No analy
 
 
 
-@dataclass
+@dataclass(slots=True)
 class ModifiedFile:
     path: str
     original_content: str
@@ -253,13 +253,13 @@ class ModifiedFile:
     backup_path: Optional[str] = None
     changes_made: List[str] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class Error:
     message: str
     file_path: Optional[str] = None
     line_number: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class ImplementationResult:
     success: bool
     modified_files: List[ModifiedFile] = field(default_factory=list)
@@ -1,4 +1,5 @@
 from repofactor.utils.toon_encoder import encode_analysis_context_toon
+from repofactor.utils.token_budget import truncate_to_tokens
 
 
 PROMPT_DEFINITION_AGENT_ANALYZE = """You are an expert code integration assistant. Analyze this repository and provide integration recommendations."""
@@ -26,26 +27,45 @@ Provide the complete modified code. Include:
 MODIFIED CODE:"""
 
 
-def PROMPT_REPO_ANALYSIS(instructions: str, relevant_files: dict, target_context: str = None) -> str:
-    """Generate prompt for repository analysis with structured JSON output (standard JSON format)"""
-    
-    prompt = f"""You are an expert code integration assistant. Analyze this repository and provide integration recommendations.
+BATCH_FILE_START = "<<<FILE {path}>>>"
+BATCH_FILE_END = "<<<END FILE>>>"
+BATCH_FILE_UNCHANGED = "<<<UNCHANGED {path}>>>"
 
-USER INSTRUCTIONS:
-{instructions}
 
-SOURCE REPOSITORY FILES:
-"""
-    
-    for filepath, content in relevant_files.items():
-        # Truncate large files
-        truncated = content[:400] if len(content) > 400 else content
-        prompt += f"\n--- {filepath} ---\n{truncated}\n"
-    
-    if target_context:
-        prompt += f"\nTARGET PROJECT CONTEXT:\n{target_context}\n"
+def PROMPT_BATCH_MODIFY(change_instructions: str, files: dict) -> str:
+    """Generate one prompt asking for modified versions of several files"""
+    blocks = "\n".join(
+        f"{BATCH_FILE_START.format(path=path)}\n{code}\n{BATCH_FILE_END}"
+        for path, code in files.items()
+    )
     
-    prompt += """
+    return f"""You are an expert Python developer. Modify each of the following files according to the instructions.
+
+INSTRUCTIONS:
+{change_instructions}
+
+FILES:
+{blocks}
+
+Return EVERY file. A modified file is its complete code wrapped in the same markers:
+{BATCH_FILE_START.format(path="<path>")}
+<complete code>
+{BATCH_FILE_END}
+
+A file that needs no changes is just one line (do not repeat its code):
+{BATCH_FILE_UNCHANGED.format(path="<path>")}
+
+No explanations and no markdown code blocks outside the markers.
+
+MODIFIED FILES:"""
+
+
+# Token allowances for file content in PROMPT_REPO_ANALYSIS: each file gets
+# an equal share of the budget, capped per file (~400 chars)
+REPO_ANALYSIS_MAX_FILE_TOKENS = 100
+REPO_ANALYSIS_FILES_TOKEN_BUDGET = 2400
+
+_REPO_ANALYSIS_RULES = """
 CRITICAL INSTRUCTIONS:
 
 You MUST respond with ONLY a valid JSON object
@@ -72,21 +92,73 @@ REQUIRED JSON STRUCTURE:
 ],
 "risks": ["potential issue 1", "potential issue 2"],
 "implementation_steps": ["1. First actionable step", "2. Second step"]
-}
+}"""
+
+_REPO_ANALYSIS_FOOTER = _REPO_ANALYSIS_RULES + """
 
 NOW ANALYZE THE REPOSITORY AND RESPOND WITH VALID JSON ONLY:"""
+
+# Stable prefix shared by every analysis call. Sent as the system prompt so
+# providers can reuse their cached prefix; the per-call prompt then carries
+# only instructions and files (split_system=True).
+REPO_ANALYSIS_SYSTEM_PROMPT = PROMPT_DEFINITION_AGENT_ANALYZE + "\n" + _REPO_ANALYSIS_RULES
+
+
+def PROMPT_REPO_ANALYSIS(
+    instructions: str,
+    relevant_files: dict,
+    target_context: str = None,
+    split_system: bool = False
+) -> str:
+    """
+    Generate prompt for repository analysis with structured JSON output (standard JSON format)
     
-    return prompt
+    With split_system=True the role and JSON rules are left out; pass
+    REPO_ANALYSIS_SYSTEM_PROMPT as the system prompt instead.
+    """
+    
+    intro = "" if split_system else (
+        "You are an expert code integration assistant. "
+        "Analyze this repository and provide integration recommendations.\n\n"
+    )
+    parts = [f"""{intro}USER INSTRUCTIONS:
+{instructions}
+
+SOURCE REPOSITORY FILES:
+"""]
+    
+    per_file_tokens = min(
+        REPO_ANALYSIS_MAX_FILE_TOKENS,
+        REPO_ANALYSIS_FILES_TOKEN_BUDGET // max(1, len(relevant_files))
+    )
+    
+    # Index each file so the model can refer to batched files unambiguously
+    for idx, (filepath, content) in enumerate(relevant_files.items(), start=1):
+        parts.append(f"\n--- [{idx}] {filepath} ---\n")
+        parts.append(truncate_to_tokens(content, per_file_tokens))
+        parts.append("\n")
+    
+    if target_context:
+        parts.append(f"\nTARGET PROJECT CONTEXT:\n{target_context}\n")
+    
+    parts.append("\nRESPOND WITH VALID JSON ONLY:" if split_system else _REPO_ANALYSIS_FOOTER)
+    
+    # Single join - linear in total prompt size
+    return "".join(parts)
 
 
 def PROMPT_REPO_ANALYSIS_TOON(
     instructions: str,
     relevant_files: dict,
-    target_context: str = None
+    target_context: str = None,
+    split_system: bool = False
 ) -> str:
     """
     Generate ULTRA-COMPACT prompt using TOON format.
     Optimized for Lightning AI's token limits.
+    
+    With split_system=True the inline JSON schema is left out; pass
+    REPO_ANALYSIS_SYSTEM_PROMPT as the system prompt instead.
     """
     
     # ✅ Encode to TOON with AGGRESSIVE truncation
@@ -97,6 +169,14 @@ def PROMPT_REPO_ANALYSIS_TOON(
         max_file_length=400
     )
     
+    if split_system:
+        return f"""Analyze this code repository.
+
+CONTEXT:
+{toon_context}
+
+JSON:"""
+    
     # ✅ SHORTER prompt template
     prompt = f"""Analyze this code repository.
 
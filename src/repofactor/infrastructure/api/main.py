@@ -9,21 +9,48 @@ from dotenv import load_dotenv; load_dotenv()
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, HttpUrl
+import asyncio
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from typing import Optional
 
 from repofactor.application.services.repo_integrator_service import (
     RepoIntegratorService
 )
+from repofactor.application.agent_service.diff_agent import shutdown_diff_pool
 
 
 # Setup
-app = FastAPI(title="RepoIntegrator API", version="0.1.0")
 logger = logging.getLogger(__name__)
 
-# Initialize service (singleton)
-repo_service = RepoIntegratorService()
+# Service singleton - built at startup, not on import, so importing this
+# module (uvicorn --reload, tooling) doesn't construct the LLM clients
+repo_service: Optional[RepoIntegratorService] = None
+
+# Blocking LLM calls and file reads run via asyncio.to_thread. The default
+# pool is sized from the CPU count (as low as 5 threads in a small container),
+# which would queue concurrent LLM requests that mostly just wait on the network.
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", 32))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global repo_service
+    pool = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="repofactor")
+    asyncio.get_running_loop().set_default_executor(pool)
+    repo_service = RepoIntegratorService()
+    try:
+        yield
+    finally:
+        await repo_service.close()
+        repo_service = None
+        shutdown_diff_pool()
+        pool.shutdown(wait=False)
+
+
+app = FastAPI(title="RepoIntegrator API", version="0.1.0", lifespan=lifespan)
 
 @app.get("/")
 def root():
@@ -5,11 +5,49 @@ Beautiful, professional interface for GitHub repo integration
 """
 
 import reflex as rx
-from typing import Optional, List, Dict
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple
 from repofactor.application.services import RepoService
 from repofactor.domain.models.integration_models import AnalysisResult
 
 
+# ============================================================================
+# Analysis Cache
+# ============================================================================
+
+# Process-level LRU of finished analyses keyed by (repo full_name, instructions).
+# Repeat submissions skip the clone + LLM round-trip and don't burn quota.
+_ANALYSIS_CACHE_MAX = 128
+_ANALYSIS_CACHE: "OrderedDict[Tuple[str, str], List[dict]]" = OrderedDict()
+
+
+def _cached_analysis(key: Tuple[str, str]) -> Optional[List[dict]]:
+    """Return cached affected files for key, marking it most recently used"""
+    files = _ANALYSIS_CACHE.get(key)
+    if files is not None:
+        _ANALYSIS_CACHE.move_to_end(key)
+    return files
+
+
+def _store_analysis(key: Tuple[str, str], files: List[dict]) -> None:
+    """Store affected files for key, evicting the least recently used entry"""
+    _ANALYSIS_CACHE[key] = files
+    _ANALYSIS_CACHE.move_to_end(key)
+    if len(_ANALYSIS_CACHE) > _ANALYSIS_CACHE_MAX:
+        _ANALYSIS_CACHE.popitem(last=False)
+
+
+# Results rendered per page - keeps the DOM and state deltas bounded
+RESULTS_PAGE_SIZE = 50
+
+# Progress messages shown while an analysis runs
+_ANALYSIS_STEPS = (
+    "Cloning repository...",
+    "Analyzing code structure...",
+    "Building dependency graph...",
+    "Generating integration plan...",
+)
+
 
 # ============================================================================
 # State Management
@@ -54,12 +92,35 @@ class RepoIntegratorState(rx.State):
     
     # Results
     affected_files: List[dict] = []
+    results_page: int = 0
+    _last_inputs: Optional[Tuple[str, str]] = None  # inputs behind affected_files
     
     # UI State
     is_loading: bool = False
     error_message: str = ""
     show_advanced: bool = False
 
+    @rx.var
+    def results_page_count(self) -> int:
+        """Number of result pages"""
+        return max(1, -(-len(self.affected_files) // RESULTS_PAGE_SIZE))
+    
+    @rx.var
+    def visible_affected_files(self) -> List[dict]:
+        """Affected files on the current page"""
+        start = self.results_page * RESULTS_PAGE_SIZE
+        return self.affected_files[start:start + RESULTS_PAGE_SIZE]
+    
+    def next_results_page(self):
+        """Show the next page of results"""
+        if self.results_page + 1 < self.results_page_count:
+            self.results_page += 1
+    
+    def prev_results_page(self):
+        """Show the previous page of results"""
+        if self.results_page > 0:
+            self.results_page -= 1
+
     def set_repo_search(self, value: str):
         """Handle repo search input"""
         self.repo_search = value
@@ -79,6 +140,7 @@ class RepoIntegratorState(rx.State):
         result: AnalysisResult = await self._integrator.analyze_repository_content
         self.analysis_result_dict = result.to_dict()
         self.affected_files = result.affected_files
+        self.results_page = 0
         self.stage = "results"
     
     def select_repo(self, repo: dict):
@@ -116,6 +178,23 @@ class RepoIntegratorState(rx.State):
             self.error_message = "Please select a repo and provide instructions"
             return
         
+        cache_key = (self.selected_repo["full_name"], self.instructions.strip())
+        
+        # Same inputs as the results already on screen - just show them again
+        if cache_key == self._last_inputs and self.affected_files:
+            self.error_message = ""
+            self.stage = "results"
+            return
+        
+        cached = _cached_analysis(cache_key)
+        if cached is not None:
+            self.error_message = ""
+            self.affected_files = list(cached)
+            self.results_page = 0
+            self._last_inputs = cache_key
+            self.stage = "results"
+            return
+        
         if self.quota_remaining <= 0:
             self.error_message = "Quota exceeded. Please upgrade or wait for monthly reset."
             return
@@ -125,16 +204,9 @@ class RepoIntegratorState(rx.State):
         self.error_message = ""
         
         # Simulate analysis steps
-        steps = [
-            "Cloning repository...",
-            "Analyzing code structure...",
-            "Building dependency graph...",
-            "Generating integration plan..."
-        ]
-        
-        for i, step in enumerate(steps):
+        for i, step in enumerate(_ANALYSIS_STEPS):
             self.current_step = step
-            self.progress = int((i + 1) / len(steps) * 100)
+            self.progress = int((i + 1) / len(_ANALYSIS_STEPS) * 100)
             yield
             # In production: await asyncio.sleep(0.5)
         
@@ -144,6 +216,9 @@ class RepoIntegratorState(rx.State):
             {"path": "src/utils/tokenizer.py", "confidence": 87, "reason": "Uses compression functions"},
             {"path": "requirements.txt", "confidence": 100, "reason": "Add dependencies"},
         ]
+        _store_analysis(cache_key, list(self.affected_files))
+        self.results_page = 0
+        self._last_inputs = cache_key
         
         self.quota_remaining -= 1
         self.stage = "results"
@@ -156,6 +231,7 @@ class RepoIntegratorState(rx.State):
         self.instructions = ""
         self.error_message = ""
         self.affected_files = []
+        self.results_page = 0
 
 
 # ============================================================================
@@ -677,10 +753,10 @@ def results_stage() -> rx.Component:
             rx.vstack(
                 rx.heading("Integration Plan", size="5", margin_bottom="16px"),
                 rx.foreach(
-                    RepoIntegratorState.affected_files,
+                    RepoIntegratorState.visible_affected_files,
                     lambda file, idx: rx.hstack(
                         rx.box(
-                            str(idx + 1),
+                            (RepoIntegratorState.results_page * RESULTS_PAGE_SIZE + idx + 1).to_string(),
                             background=f"{COLORS['purple_600']}20",
                             border_radius="8px",
                             padding="8px 12px",
@@ -704,6 +780,31 @@ def results_stage() -> rx.Component:
                         border_radius="8px",
                     ),
                 ),
+                rx.cond(
+                    RepoIntegratorState.results_page_count > 1,
+                    rx.hstack(
+                        rx.button(
+                            "Previous",
+                            on_click=RepoIntegratorState.prev_results_page,
+                            disabled=RepoIntegratorState.results_page == 0,
+                            variant="soft",
+                        ),
+                        rx.text(
+                            f"Page {RepoIntegratorState.results_page + 1} of {RepoIntegratorState.results_page_count}",
+                            color=COLORS["text_secondary"],
+                            font_size="14px",
+                        ),
+                        rx.button(
+                            "Next",
+                            on_click=RepoIntegratorState.next_results_page,
+                            disabled=RepoIntegratorState.results_page + 1 >= RepoIntegratorState.results_page_count,
+                            variant="soft",
+                        ),
+                        justify="between",
+                        align="center",
+                        width="100%",
+                    ),
+                ),
                 spacing="3",
             ),
             border_radius="16px",
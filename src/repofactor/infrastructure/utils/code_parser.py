@@ -7,6 +7,14 @@ from repofactor.domain.models.integration_models import Solution
 
 logger = logging.getLogger(__name__)
 
+_CODE_BLOCK_RE = re.compile(r"```(?:[a-zA-Z0-9_+-]+)?\n(.*?)```", re.DOTALL)
+_URL_RE = re.compile(r"https?://[^\s)]+")
+_SEARCH_QUERY_RES = (
+    re.compile(r"[Qq]uery:\s*(.+)"),
+    re.compile(r"[Ss]earch query:\s*(.+)"),
+    re.compile(r"#\s*Search:\s*(.+)"),
+)
+
 
 def extract_imports(code: str) -> List[str]:
     """Extract all imports from Python code"""
@@ -79,10 +87,9 @@ def classify_source(url: str) -> str:
 
 def extract_code_from_text(text: str) -> Optional[str]:
     """Extract first fenced code block from markdown-like text."""
-    code_pattern = r"```(?:[a-zA-Z0-9_+-]+)?\n(.*?)```"
-    matches = re.findall(code_pattern, text, re.DOTALL)
-    if matches:
-        return matches[0].strip()
+    match = _CODE_BLOCK_RE.search(text)
+    if match:
+        return match.group(1).strip()
     return None
 
 def calculate_confidence(chunk) -> float:
@@ -100,8 +107,7 @@ def calculate_confidence(chunk) -> float:
 def parse_solutions_from_text(text: str) -> List[Solution]:
     # Fallback parsing: collect URLs as generic web solutions.
     solutions: List[Solution] = []
-    url_pattern = r"https?://[^\s)]+"
-    for match in re.finditer(url_pattern, text):
+    for match in _URL_RE.finditer(text):
         url = match.group(0)
         solutions.append(
             Solution(
@@ -125,13 +131,8 @@ def extract_search_queries(response) -> List[str]:
     if text is None:
         text = str(response)
 
-    patterns = [
-        r"[Qq]uery:\s*(.+)",
-        r"[Ss]earch query:\s*(.+)",
-        r"#\s*Search:\s*(.+)",
-    ]
-    for pattern in patterns:
-        for match in re.finditer(pattern, text):
+    for pattern in _SEARCH_QUERY_RES:
+        for match in pattern.finditer(text):
             q = match.group(1).strip().rstrip("`*_-")
             if q and q not in queries:
                 queries.append(q)
@@ -0,0 +1,32 @@
+import os
+from typing import FrozenSet, Iterator
+
+DEFAULT_EXCLUDED_DIRS = frozenset({
+    '__pycache__', '.git', 'venv', '.venv',
+    'node_modules', 'dist', 'build'
+})
+
+
+def iter_python_files(root: str, excluded: FrozenSet[str] = DEFAULT_EXCLUDED_DIRS) -> Iterator[str]:
+    """
+    Yield paths of all .py files under root.
+
+    Uses an explicit stack over os.scandir so directory entries come with their
+    type from the directory listing (no extra stat per entry), and excluded,
+    hidden and *.egg-info directories are pruned before descending into them.
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if name in excluded or name.startswith('.') or name.endswith('.egg-info'):
+                            continue
+                        stack.append(entry.path)
+                    elif name.endswith('.py'):
+                        yield entry.path
+        except OSError:
+            continue
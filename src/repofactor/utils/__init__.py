@@ -7,9 +7,15 @@ from .toon_encoder import (
     encode_files_toon,
     encode_analysis_context_toon
 )
+from .token_budget import truncate_to_tokens
+from .diff_tools import FileDiff, diff_file, unified_diff
 
 __all__ = [
     'encode_toon',
     'encode_files_toon',
-    'encode_analysis_context_toon'
+    'encode_analysis_context_toon',
+    'truncate_to_tokens',
+    'FileDiff',
+    'diff_file',
+    'unified_diff'
 ]
@@ -0,0 +1,101 @@
+"""
+Unified diffs of whole files
+============================
+
+Kept free of application imports: DiffAgent runs diff_file in worker
+processes, and each worker imports this module on its own.
+"""
+
+import difflib
+from typing import List, Optional, Tuple
+
+# cdifflib's CSequenceMatcher is a drop-in C implementation of difflib's matcher
+try:
+    from cdifflib import CSequenceMatcher as _SequenceMatcher
+except ImportError:
+    _SequenceMatcher = difflib.SequenceMatcher
+
+
+class FileDiff:
+    __slots__ = ("path", "diff_text", "change_summary")
+
+    def __init__(self, path: str, diff_text: str, change_summary: List[str]):
+        self.path = path
+        self.diff_text = diff_text
+        self.change_summary = change_summary
+
+
+def _format_range(start: int, stop: int) -> str:
+    """Unified-diff hunk range, as difflib formats it"""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def unified_diff(
+    a: List[str], b: List[str], fromfile: str, tofile: str, n: int = 3
+) -> Tuple[List[str], int, int]:
+    """
+    Same lines as difflib.unified_diff(..., lineterm=""), but matched with
+    _SequenceMatcher so the C matcher is used when cdifflib is installed.
+    
+    Returns:
+        (diff lines, lines added, lines removed) - counted from the opcodes,
+        so the diff never has to be re-scanned
+    """
+    if not a or not b:
+        # Pure addition or removal: a single hunk, nothing to match
+        if not a and not b:
+            return [], 0, 0
+        lines = [
+            f"--- {fromfile}",
+            f"+++ {tofile}",
+            f"@@ -{_format_range(0, len(a))} +{_format_range(0, len(b))} @@",
+        ]
+        lines += ("-" + line for line in a)
+        lines += ("+" + line for line in b)
+        return lines, len(b), len(a)
+
+    lines = []
+    added = removed = 0
+    for group in _SequenceMatcher(None, a, b).get_grouped_opcodes(n):
+        if not lines:
+            lines += (f"--- {fromfile}", f"+++ {tofile}")
+        first, last = group[0], group[-1]
+        lines.append(
+            f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@"
+        )
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                lines += (" " + line for line in a[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                lines += ("-" + line for line in a[i1:i2])
+                removed += i2 - i1
+            if tag in ("replace", "insert"):
+                lines += ("+" + line for line in b[j1:j2])
+                added += j2 - j1
+    return lines, added, removed
+
+
+def diff_file(path: str, original_text: str, modified_text: str) -> Optional[Tuple[FileDiff, int, int]]:
+    """
+    Diff one file (top-level so worker processes can run it).
+    
+    Returns:
+        (FileDiff, lines added, lines removed), or None if the lines are equal
+    """
+    original = original_text.splitlines()
+    modified = modified_text.splitlines()
+    if original == modified:
+        return None
+    diff, added, removed = unified_diff(original, modified, f"base/{path}", f"mod/{path}")
+    summary = []
+    if not original: summary.append("File Added")
+    elif not modified: summary.append("File Removed")
+    else: summary.append(f"Lines Changed: {len(diff)}")
+    return FileDiff(path, "\n".join(diff), summary), added, removed
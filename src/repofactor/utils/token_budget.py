@@ -0,0 +1,61 @@
+"""
+Token-aware truncation for prompt building
+==========================================
+
+Characters are a poor proxy for LLM context use - identifier-heavy code and
+dense logic differ a lot in tokens per char. When tiktoken (and its BPE file)
+is available, text is cut at a token count; otherwise we fall back to the
+usual ~4 chars per token estimate.
+"""
+
+import functools
+import logging
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_NAME = "cl100k_base"
+CHARS_PER_TOKEN = 4  # Fallback estimate when no tokenizer is available
+
+
+@functools.lru_cache(maxsize=1)
+def get_encoding() -> Optional["tiktoken.Encoding"]:
+    """Shared tiktoken encoder, or None if tiktoken or its BPE data is unavailable"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:
+        # First use downloads the BPE file; offline hosts land here
+        logger.warning(f"tiktoken unavailable, using char-based truncation: {e}")
+        return None
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to at most max_tokens tokens
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token allowance
+
+    Returns:
+        text unchanged if it fits, else its first max_tokens tokens
+    """
+    enc = get_encoding()
+    if enc is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+
+    # Cheap exit: no token is shorter than one char
+    if len(text) <= max_tokens:
+        return text
+
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
@@ -26,7 +26,12 @@ Usage:
 """
 
 from typing import Any, Dict, List, Union
+import functools
 import json
+import operator
+
+# Characters that force a string to be JSON-quoted
+_SPECIAL_CHARS = (':', '"', '\\', '\n', '\r')
 
 
 def encode_toon(data: Any, indent: int = 2, delimiter: str = ',') -> str:
@@ -53,15 +58,42 @@ def encode_toon(data: Any, indent: int = 2, delimiter: str = ',') -> str:
 
 
 class ToonEncoder:
-    """TOON format encoder"""
+    """
+    TOON format encoder
+    
+    Every nested structure appends its lines to one shared buffer, which is
+    joined once at the end - no intermediate strings per nesting level.
+    """
     
     def __init__(self, indent: int = 2, delimiter: str = ','):
         self.indent = indent
         self.delimiter = delimiter
+        
+        # Delimiter-specific marker used in array headers
+        if delimiter == '\t':
+            self._delim_marker = '\t'
+        elif delimiter == '|':
+            self._delim_marker = '|'
+        else:  # comma
+            self._delim_marker = ''
     
     def encode(self, value: Any, level: int = 0) -> str:
         """Encode a value at given indentation level"""
-        
+        lines: List[str] = []
+        self._emit(value, level, lines)
+        return "\n".join(lines)
+    
+    def _emit(self, value: Any, level: int, lines: List[str]) -> None:
+        """Append the encoded lines of any value to lines"""
+        if isinstance(value, dict):
+            self._encode_object(value, level, lines)
+        elif isinstance(value, list):
+            self._encode_array(value, level, lines)
+        else:
+            lines.append(self._encode_scalar(value))
+    
+    def _encode_scalar(self, value: Any) -> str:
+        """Encode a primitive (non-container) value"""
         if value is None:
             return "null"
         elif isinstance(value, bool):
@@ -70,10 +102,6 @@ class ToonEncoder:
             return self._encode_number(value)
         elif isinstance(value, str):
             return self._quote_string(value)
-        elif isinstance(value, dict):
-            return self._encode_object(value, level)
-        elif isinstance(value, list):
-            return self._encode_array(value, level)
         else:
             # Fallback to JSON
             return json.dumps(value)
@@ -87,14 +115,10 @@ class ToonEncoder:
             return f"{num:.10g}"  # Up to 10 significant digits
         return str(num)
     
-    def _encode_object(self, obj: Dict, level: int) -> str:
+    def _encode_object(self, obj: Dict, level: int, lines: List[str]) -> None:
         """Encode object as key:value pairs"""
         
-        if not obj:
-            return ""
-        
         spaces = " " * (self.indent * level)
-        lines = []
         
         for key, value in obj.items():
             quoted_key = self._quote_key(key)
@@ -102,51 +126,44 @@ class ToonEncoder:
             if isinstance(value, dict):
                 # Nested object
                 lines.append(f"{spaces}{quoted_key}:")
-                nested = self._encode_object(value, level + 1)
-                if nested:
-                    lines.append(nested)
+                self._encode_object(value, level + 1, lines)
             elif isinstance(value, list):
                 # Array
-                array_str = self._encode_array_with_key(value, level + 1, key)
-                lines.append(array_str)
+                self._encode_array_with_key(value, level + 1, key, lines)
             else:
                 # Primitive
-                value_str = self.encode(value, level)
-                lines.append(f"{spaces}{quoted_key}: {value_str}")
-        
-        return "\n".join(lines)
+                lines.append(f"{spaces}{quoted_key}: {self._encode_scalar(value)}")
     
-    def _encode_array_with_key(self, arr: List, level: int, key: str) -> str:
+    def _encode_array_with_key(self, arr: List, level: int, key: str, lines: List[str]) -> None:
         """Encode array with key prefix"""
         
         if not arr:
             spaces = " " * (self.indent * (level - 1))
-            return f"{spaces}{key}[0]:"
+            lines.append(f"{spaces}{key}[0]:")
         
         # Check if tabular (uniform objects with primitives)
-        if self._is_tabular(arr):
-            return self._encode_tabular(arr, level, key)
+        elif self._is_tabular(arr):
+            self._encode_tabular(arr, level, lines, key)
         
         # Check if all primitives (inline)
-        if all(isinstance(v, (str, int, float, bool, type(None))) for v in arr):
-            return self._encode_inline(arr, level, key)
+        elif all(isinstance(v, (str, int, float, bool, type(None))) for v in arr):
+            self._encode_inline(arr, level, lines, key)
         
         # List format
-        return self._encode_list(arr, level, key)
+        else:
+            self._encode_list(arr, level, lines, key)
     
-    def _encode_array(self, arr: List, level: int) -> str:
+    def _encode_array(self, arr: List, level: int, lines: List[str]) -> None:
         """Encode array without key prefix"""
         
         if not arr:
-            return "[0]:"
-        
-        if self._is_tabular(arr):
-            return self._encode_tabular(arr, level)
-        
-        if all(isinstance(v, (str, int, float, bool, type(None))) for v in arr):
-            return self._encode_inline(arr, level)
-        
-        return self._encode_list(arr, level)
+            lines.append("[0]:")
+        elif self._is_tabular(arr):
+            self._encode_tabular(arr, level, lines)
+        elif all(isinstance(v, (str, int, float, bool, type(None))) for v in arr):
+            self._encode_inline(arr, level, lines)
+        else:
+            self._encode_list(arr, level, lines)
     
     def _is_tabular(self, arr: List) -> bool:
         """Check if array is tabular (uniform objects with primitive values)"""
@@ -166,82 +183,68 @@ class ToonEncoder:
         
         return True
     
-    def _encode_tabular(self, arr: List[Dict], level: int, key: str = None) -> str:
+    def _encode_tabular(self, arr: List[Dict], level: int, lines: List[str], key: str = None) -> None:
         """Encode as TOON table: key[N]{field1,field2}: val1,val2"""
         
         spaces = " " * (self.indent * (level - 1))
         
         # Header: [N]{fields}:
         fields = list(arr[0].keys())
-        
-        # Use delimiter-specific header format
-        if self.delimiter == '\t':
-            delim_marker = '\t'
-            field_str = '\t'.join(fields)
-        elif self.delimiter == '|':
-            delim_marker = '|'
-            field_str = '|'.join(fields)
-        else:  # comma
-            delim_marker = ''
-            field_str = ','.join(fields)
+        field_str = (self.delimiter if self._delim_marker else ',').join(fields)
         
         if key:
-            header = f"{spaces}{key}[{len(arr)}{delim_marker}]{{{field_str}}}:"
+            lines.append(f"{spaces}{key}[{len(arr)}{self._delim_marker}]{{{field_str}}}:")
         else:
-            header = f"[{len(arr)}{delim_marker}]{{{field_str}}}:"
+            lines.append(f"[{len(arr)}{self._delim_marker}]{{{field_str}}}:")
         
-        lines = [header]
+        # Data rows - one C-level itemgetter call per row pulls every column
+        if len(fields) > 1:
+            rows = map(operator.itemgetter(*fields), arr)
+        elif fields:
+            rows = ((item[fields[0]],) for item in arr)
+        else:
+            rows = (() for _ in arr)  # Uniform empty objects
         
-        # Data rows
         row_spaces = " " * (self.indent * level)
-        for item in arr:
-            values = [self.encode(item[f], level) for f in fields]
-            lines.append(row_spaces + self.delimiter.join(values))
-        
-        return "\n".join(lines)
+        encode = self._encode_scalar
+        delimiter = self.delimiter
+        lines.extend(row_spaces + delimiter.join(map(encode, values)) for values in rows)
     
-    def _encode_inline(self, arr: List, level: int, key: str = None) -> str:
+    def _encode_inline(self, arr: List, level: int, lines: List[str], key: str = None) -> None:
         """Encode primitive array inline: key[N]: val1,val2,val3"""
         
         spaces = " " * (self.indent * (level - 1))
-        values = [self.encode(v, level) for v in arr]
-        
-        # Delimiter-aware header
-        if self.delimiter == '\t':
-            delim_marker = '\t'
-        elif self.delimiter == '|':
-            delim_marker = '|'
-        else:
-            delim_marker = ''
+        values = self.delimiter.join([self._encode_scalar(v) for v in arr])
         
         if key:
-            return f"{spaces}{key}[{len(arr)}{delim_marker}]: {self.delimiter.join(values)}"
+            lines.append(f"{spaces}{key}[{len(arr)}{self._delim_marker}]: {values}")
         else:
-            return f"[{len(arr)}{delim_marker}]: {self.delimiter.join(values)}"
+            lines.append(f"[{len(arr)}{self._delim_marker}]: {values}")
     
-    def _encode_list(self, arr: List, level: int, key: str = None) -> str:
+    def _encode_list(self, arr: List, level: int, lines: List[str], key: str = None) -> None:
         """Encode non-uniform array as list: - item1 / - item2"""
         
         spaces = " " * (self.indent * (level - 1))
         
         # Header
         if key:
-            header = f"{spaces}{key}[{len(arr)}]:"
+            lines.append(f"{spaces}{key}[{len(arr)}]:")
         else:
-            header = f"[{len(arr)}]:"
-        
-        lines = [header]
+            lines.append(f"[{len(arr)}]:")
         
         # List items
         item_spaces = " " * (self.indent * level)
         for item in arr:
             if isinstance(item, (dict, list)):
-                item_str = self.encode(item, level)
-                lines.append(f"{item_spaces}- {item_str}")
+                # Nested item: its first line carries the "- " marker
+                start = len(lines)
+                self._emit(item, level, lines)
+                if len(lines) == start:
+                    lines.append(f"{item_spaces}- ")
+                else:
+                    lines[start] = f"{item_spaces}- {lines[start]}"
             else:
-                lines.append(f"{item_spaces}- {self.encode(item, level)}")
-        
-        return "\n".join(lines)
+                lines.append(f"{item_spaces}- {self._encode_scalar(item)}")
     
     def _quote_key(self, key: str) -> str:
         """Quote key if needed (must be valid identifier)"""
@@ -258,31 +261,42 @@ class ToonEncoder:
     
     def _quote_string(self, s: str) -> str:
         """Quote string if needed"""
-        
-        # Empty or has leading/trailing spaces
-        if not s or s != s.strip():
-            return json.dumps(s)
-        
-        # Contains special chars
-        special_chars = [':', '"', '\\', '\n', '\r']
-        if self.delimiter in s or any(c in s for c in special_chars):
-            return json.dumps(s)
-        
-        # Looks like boolean/number/null
-        if s.lower() in ('true', 'false', 'null'):
-            return f'"{s}"'
-        
-        try:
-            float(s)
-            return f'"{s}"'
-        except ValueError:
-            pass
-        
-        # Looks like structure
-        if s.startswith('- ') or s.startswith('[') or s.startswith('{'):
-            return json.dumps(s)
-        
-        return s
+        return _quote_string(s, self.delimiter)
+
+
+@functools.lru_cache(maxsize=4096)
+def _quote_string(s: str, delimiter: str) -> str:
+    """
+    Quote string if needed for the given delimiter
+    
+    Memoized: the same (already truncated) file bodies are re-encoded for
+    every agent prompt in a run, and json-escaping them is the bulk of
+    the encoding cost.
+    """
+    
+    # Empty or has leading/trailing spaces
+    if not s or s != s.strip():
+        return json.dumps(s)
+    
+    # Contains special chars
+    if delimiter in s or any(c in s for c in _SPECIAL_CHARS):
+        return json.dumps(s)
+    
+    # Looks like boolean/number/null
+    if s.lower() in ('true', 'false', 'null'):
+        return f'"{s}"'
+    
+    try:
+        float(s)
+        return f'"{s}"'
+    except ValueError:
+        pass
+    
+    # Looks like structure
+    if s.startswith('- ') or s.startswith('[') or s.startswith('{'):
+        return json.dumps(s)
+    
+    return s
 
 
 # ============================================================================